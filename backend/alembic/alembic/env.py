@@ -7,8 +7,8 @@ from alembic import context
 
 config = context.config
 
-# Logging
-if config.config_file_name is not None:
+# Logging (solo desde la CLI: dentro de la aplicación se respeta su configuración)
+if config.config_file_name is not None and 'connection' not in config.attributes:
     fileConfig(config.config_file_name)
 
 from app.database import Database
@@ -19,12 +19,17 @@ from app.models.exercise import Exercise
 from app.models.routine_exercise import RoutineExercise
 from app.models.routine import Routine
 from app.models.user import User
-from app.models.exercise_progress import ExerciseProgress
+from app.models.exercise_progress import ExerciseProgress, is_partition
 from app.models.food_meal import FoodMeal
 
+# Importar cualquier modelo carga app.models, que registra todos en la metadata
 target_metadata = Database.base.metadata
 
 
+def include_name(name, type_, parent_names) -> bool:
+    # Las particiones de exercise_progress no están en los modelos: las gestiona tools/progress_partitions.py
+    return not (type_ == 'table' and is_partition(name))
+
 
 def run_migrations_offline() -> None:
     """Ejecuta migraciones en modo offline."""
@@ -32,6 +37,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -42,6 +48,12 @@ def run_migrations_offline() -> None:
 
 def run_migrations_online() -> None:
     """Ejecuta migraciones en modo online."""
+    # Database.migrate pasa su propia conexión, que ya tiene el advisory lock
+    connection = config.attributes.get('connection')
+    if connection is not None:
+        run_migrations(connection)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section),
         prefix="sqlalchemy.",
@@ -49,13 +61,18 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=target_metadata
-        )
+        run_migrations(connection)
+
 
-        with context.begin_transaction():
-            context.run_migrations()
+def run_migrations(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
 
 
 if context.is_offline_mode():
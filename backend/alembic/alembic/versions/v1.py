@@ -0,0 +1,37 @@
+"""update_20261018_201500
+
+Revision ID: 4c7e1f0a92d3
+Revises: 19ab5ed91833
+Create Date: 2026-10-18 20:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7e1f0a92d3'
+down_revision: Union[str, Sequence[str], None] = '19ab5ed91833'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('food_search_cache',
+    sa.Column('query', sa.String(), nullable=False),
+    sa.Column('results', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('query')
+    )
+    op.create_index(op.f('ix_food_search_cache_expires_at'), 'food_search_cache', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_food_search_cache_expires_at'), table_name='food_search_cache')
+    op.drop_table('food_search_cache')
@@ -0,0 +1,54 @@
+"""update_20261019_050000
+
+Revision ID: 9c3e7a1f5b20
+Revises: 5b0d8f2c6e97
+Create Date: 2026-10-19 05:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e7a1f5b20'
+down_revision: Union[str, Sequence[str], None] = '5b0d8f2c6e97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'revoked_users',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('token_version', sa.BigInteger(), nullable=False),
+        sa.Column('revoked_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    op.create_index(op.f('ix_revoked_users_token_version'), 'revoked_users', ['token_version'], unique=False)
+
+    # Al borrar un usuario, una versión nueva de la misma secuencia que users.token_version: los procesos
+    # la ven al ponerse al día, aunque el borrado se haga en otro proceso o fuera del ORM
+    op.execute("""
+        CREATE FUNCTION users_revoke_tokens() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO revoked_users (user_id, token_version)
+            VALUES (OLD.id, nextval('users_token_version_seq'));
+            RETURN OLD;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER users_revoke_tokens AFTER DELETE ON users
+        FOR EACH ROW EXECUTE FUNCTION users_revoke_tokens()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER users_revoke_tokens ON users')
+    op.execute('DROP FUNCTION users_revoke_tokens()')
+    op.drop_index(op.f('ix_revoked_users_token_version'), table_name='revoked_users')
+    op.drop_table('revoked_users')
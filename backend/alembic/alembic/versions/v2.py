@@ -0,0 +1,34 @@
+"""update_20261018_204000
+
+Revision ID: 8b2d5a6e13f7
+Revises: 4c7e1f0a92d3
+Create Date: 2026-10-18 20:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2d5a6e13f7'
+down_revision: Union[str, Sequence[str], None] = '4c7e1f0a92d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # pg_trgm es una extensión "trusted": el propietario de la base de datos puede crearla
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_foods_name_trgm', 'foods', ['name'], unique=False,
+        postgresql_using='gist', postgresql_ops={'name': 'gist_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_foods_name_trgm', table_name='foods', postgresql_using='gist', postgresql_ops={'name': 'gist_trgm_ops'},
+    )
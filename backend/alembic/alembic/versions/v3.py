@@ -0,0 +1,55 @@
+"""update_20261018_220000
+
+Revision ID: 2f9a7c41d5e8
+Revises: 8b2d5a6e13f7
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f9a7c41d5e8'
+down_revision: Union[str, Sequence[str], None] = '8b2d5a6e13f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('meal_nutrition',
+    sa.Column('meal_id', sa.Integer(), nullable=False),
+    sa.Column('diet_id', sa.Integer(), nullable=True),
+    sa.Column('calories', sa.Float(), nullable=False),
+    sa.Column('carbs', sa.Float(), nullable=False),
+    sa.Column('fats', sa.Float(), nullable=False),
+    sa.Column('protein', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['diet_id'], ['diets.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['meal_id'], ['meals.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('meal_id')
+    )
+    op.create_index(op.f('ix_meal_nutrition_diet_id'), 'meal_nutrition', ['diet_id'], unique=False)
+
+    # Rellenar con los totales de las comidas existentes
+    op.execute("""
+        INSERT INTO meal_nutrition (meal_id, diet_id, calories, carbs, fats, protein)
+        SELECT meals.id, meals.diet_id,
+               coalesce(sum(food_meal.servings * foods.calories), 0),
+               coalesce(sum(food_meal.servings * foods.carbs), 0),
+               coalesce(sum(food_meal.servings * foods.fats), 0),
+               coalesce(sum(food_meal.servings * foods.protein), 0)
+        FROM meals
+        LEFT JOIN food_meal ON food_meal.meal_id = meals.id
+        LEFT JOIN foods ON foods.id = food_meal.food_id
+        GROUP BY meals.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_meal_nutrition_diet_id'), table_name='meal_nutrition')
+    op.drop_table('meal_nutrition')
@@ -0,0 +1,51 @@
+"""update_20261018_230000
+
+Revision ID: 6d3e0b8a4c21
+Revises: 2f9a7c41d5e8
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d3e0b8a4c21'
+down_revision: Union[str, Sequence[str], None] = '2f9a7c41d5e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Claves ajenas y filtros de los listados: sin estos índices cada consulta es un Seq Scan
+    op.create_index('ix_diets_trainer_id_id', 'diets', ['trainer_id', 'id'], unique=False)
+    op.create_index('ix_diets_client_id_id', 'diets', ['client_id', 'id'], unique=False)
+    op.create_index('ix_routines_trainer_id_id', 'routines', ['trainer_id', 'id'], unique=False)
+    op.create_index('ix_routines_client_id_id', 'routines', ['client_id', 'id'], unique=False)
+    op.create_index(op.f('ix_meals_diet_id'), 'meals', ['diet_id'], unique=False)
+    op.create_index(op.f('ix_food_meal_meal_id'), 'food_meal', ['meal_id'], unique=False)
+    op.create_index(op.f('ix_food_meal_food_id'), 'food_meal', ['food_id'], unique=False)
+    op.create_index(op.f('ix_routine_exercise_routine_id'), 'routine_exercise', ['routine_id'], unique=False)
+    op.create_index(
+        'ix_exercise_progress_user_id_exercise_id', 'exercise_progress', ['user_id', 'exercise_id'], unique=False,
+    )
+    op.create_index(op.f('ix_exercise_progress_exercise_id'), 'exercise_progress', ['exercise_id'], unique=False)
+    # Búsqueda exacta por nombre (POST /foods/meal/{meal_id}); el índice trigram no sirve para igualdad
+    op.create_index(op.f('ix_foods_name'), 'foods', ['name'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_foods_name'), table_name='foods')
+    op.drop_index(op.f('ix_exercise_progress_exercise_id'), table_name='exercise_progress')
+    op.drop_index('ix_exercise_progress_user_id_exercise_id', table_name='exercise_progress')
+    op.drop_index(op.f('ix_routine_exercise_routine_id'), table_name='routine_exercise')
+    op.drop_index(op.f('ix_food_meal_food_id'), table_name='food_meal')
+    op.drop_index(op.f('ix_food_meal_meal_id'), table_name='food_meal')
+    op.drop_index(op.f('ix_meals_diet_id'), table_name='meals')
+    op.drop_index('ix_routines_client_id_id', table_name='routines')
+    op.drop_index('ix_routines_trainer_id_id', table_name='routines')
+    op.drop_index('ix_diets_client_id_id', table_name='diets')
+    op.drop_index('ix_diets_trainer_id_id', table_name='diets')
@@ -0,0 +1,31 @@
+"""update_20261019_010000
+
+Revision ID: 4a8d1c6e9f02
+Revises: 9c4e2f7a1b36
+Create Date: 2026-10-19 01:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a8d1c6e9f02'
+down_revision: Union[str, Sequence[str], None] = '9c4e2f7a1b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Los alimentos ya guardados no tienen id de FatSecret: se quedan en NULL y se siguen reutilizando por nombre
+    op.add_column('foods', sa.Column('external_id', sa.BigInteger(), nullable=True))
+    op.create_index(op.f('ix_foods_external_id'), 'foods', ['external_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_foods_external_id'), table_name='foods')
+    op.drop_column('foods', 'external_id')
@@ -0,0 +1,40 @@
+"""update_20261019_020000
+
+Revision ID: 2f6b9e3d7a15
+Revises: 4a8d1c6e9f02
+Create Date: 2026-10-19 02:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6b9e3d7a15'
+down_revision: Union[str, Sequence[str], None] = '4a8d1c6e9f02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Las filas que ya existían no tienen fecha: se quedan con la de la migración
+    op.add_column('exercise_progress', sa.Column(
+        'recorded_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False,
+    ))
+    # El índice nuevo empieza por las mismas columnas: sirve también para lo que usaba el anterior
+    op.create_index(
+        'ix_exercise_progress_user_id_exercise_id_recorded_at',
+        'exercise_progress',
+        ['user_id', 'exercise_id', 'recorded_at'],
+    )
+    op.drop_index('ix_exercise_progress_user_id_exercise_id', table_name='exercise_progress')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_exercise_progress_user_id_exercise_id', 'exercise_progress', ['user_id', 'exercise_id'])
+    op.drop_index('ix_exercise_progress_user_id_exercise_id_recorded_at', table_name='exercise_progress')
+    op.drop_column('exercise_progress', 'recorded_at')
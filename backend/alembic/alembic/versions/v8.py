@@ -0,0 +1,116 @@
+"""update_20261019_030000
+
+Revision ID: 7e1c5a9b3d48
+Revises: 2f6b9e3d7a15
+Create Date: 2026-10-19 03:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e1c5a9b3d48'
+down_revision: Union[str, Sequence[str], None] = '2f6b9e3d7a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Meses que se crean por adelantado (los mismos que tools/progress_partitions.py por defecto)
+AHEAD_MONTHS = 3
+
+INDEXES = (
+    'CREATE INDEX ix_exercise_progress_id ON exercise_progress (id)',
+    'CREATE INDEX ix_exercise_progress_exercise_id ON exercise_progress (exercise_id)',
+    'CREATE INDEX ix_exercise_progress_user_id_exercise_id_recorded_at '
+    'ON exercise_progress (user_id, exercise_id, recorded_at)',
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # La tabla actual se copia a una particionada por meses de recorded_at (UTC) y se borra.
+    # La secuencia de id pasa a la tabla nueva, así que los id no cambian.
+    op.execute('ALTER TABLE exercise_progress RENAME TO exercise_progress_unpartitioned')
+    op.execute('ALTER INDEX exercise_progress_pkey RENAME TO exercise_progress_unpartitioned_pkey')
+    op.execute('DROP INDEX ix_exercise_progress_id, ix_exercise_progress_exercise_id, '
+               'ix_exercise_progress_user_id_exercise_id_recorded_at')
+
+    op.execute("""
+        CREATE TABLE exercise_progress (
+            id INTEGER NOT NULL DEFAULT nextval('exercise_progress_id_seq'),
+            exercise_id INTEGER CONSTRAINT exercise_progress_exercise_id_fkey REFERENCES exercises (id),
+            user_id INTEGER CONSTRAINT exercise_progress_user_id_fkey REFERENCES users (id),
+            weight DOUBLE PRECISION,
+            repetitions INTEGER,
+            recorded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT exercise_progress_pkey PRIMARY KEY (id, recorded_at)
+        ) PARTITION BY RANGE (recorded_at)
+    """)
+    op.execute('ALTER SEQUENCE exercise_progress_id_seq OWNED BY exercise_progress.id')
+    # Los índices del padre se crean también en cada partición
+    for index in INDEXES:
+        op.execute(index)
+
+    # Un mes por partición, desde el de la serie más antigua hasta AHEAD_MONTHS meses después del actual
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month TIMESTAMP;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', coalesce(min(recorded_at), now()) AT TIME ZONE 'UTC'),
+                    date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{AHEAD_MONTHS} months',
+                    interval '1 month'
+                )
+                FROM exercise_progress_unpartitioned
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF exercise_progress FOR VALUES FROM (%L) TO (%L)',
+                    'exercise_progress_' || to_char(month, 'YYYY_MM'),
+                    month::text || '+00',
+                    (month + interval '1 month')::text || '+00'
+                );
+            END LOOP;
+        END
+        $$
+    """)
+    op.execute('CREATE TABLE exercise_progress_default PARTITION OF exercise_progress DEFAULT')
+
+    op.execute("""
+        INSERT INTO exercise_progress (id, exercise_id, user_id, weight, repetitions, recorded_at)
+        SELECT id, exercise_id, user_id, weight, repetitions, recorded_at FROM exercise_progress_unpartitioned
+    """)
+    op.execute('DROP TABLE exercise_progress_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Solo vuelven las filas de las particiones que siguen enganchadas (no las archivadas)
+    op.execute('ALTER TABLE exercise_progress RENAME TO exercise_progress_partitioned')
+    op.execute('ALTER INDEX exercise_progress_pkey RENAME TO exercise_progress_partitioned_pkey')
+    op.execute('DROP INDEX ix_exercise_progress_id, ix_exercise_progress_exercise_id, '
+               'ix_exercise_progress_user_id_exercise_id_recorded_at')
+
+    op.execute("""
+        CREATE TABLE exercise_progress (
+            id INTEGER NOT NULL DEFAULT nextval('exercise_progress_id_seq'),
+            exercise_id INTEGER CONSTRAINT exercise_progress_exercise_id_fkey REFERENCES exercises (id),
+            user_id INTEGER CONSTRAINT exercise_progress_user_id_fkey REFERENCES users (id),
+            weight DOUBLE PRECISION,
+            repetitions INTEGER,
+            recorded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT exercise_progress_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute('ALTER SEQUENCE exercise_progress_id_seq OWNED BY exercise_progress.id')
+    op.execute("""
+        INSERT INTO exercise_progress (id, exercise_id, user_id, weight, repetitions, recorded_at)
+        SELECT id, exercise_id, user_id, weight, repetitions, recorded_at FROM exercise_progress_partitioned
+    """)
+    for index in INDEXES:
+        op.execute(index)
+
+    # Borrar el padre borra también sus particiones
+    op.execute('DROP TABLE exercise_progress_partitioned')
@@ -0,0 +1,55 @@
+"""update_20261019_040000
+
+Revision ID: 5b0d8f2c6e97
+Revises: 7e1c5a9b3d48
+Create Date: 2026-10-19 04:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0d8f2c6e97'
+down_revision: Union[str, Sequence[str], None] = '7e1c5a9b3d48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Columnas de users que van firmadas en el token (AuthUser)
+CLAIM_COLUMNS = ('username', 'first_name', 'last_name', 'is_admin', 'birth_date', 'height', 'weight', 'gender')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.BigInteger(), server_default='0', nullable=False))
+    op.create_index(op.f('ix_users_token_version'), 'users', ['token_version'], unique=False)
+
+    # Una secuencia para todos los usuarios: los procesos se ponen al día pidiendo las versiones
+    # mayores que la última que vieron. El trigger cubre también los cambios hechos fuera del ORM.
+    old = ', '.join(f'OLD.{column}' for column in CLAIM_COLUMNS)
+    new = ', '.join(f'NEW.{column}' for column in CLAIM_COLUMNS)
+    op.execute('CREATE SEQUENCE users_token_version_seq')
+    op.execute("""
+        CREATE FUNCTION users_bump_token_version() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.token_version := nextval('users_token_version_seq');
+            RETURN NEW;
+        END
+        $$
+    """)
+    op.execute(f"""
+        CREATE TRIGGER users_bump_token_version BEFORE UPDATE ON users
+        FOR EACH ROW WHEN (({old}) IS DISTINCT FROM ({new}))
+        EXECUTE FUNCTION users_bump_token_version()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER users_bump_token_version ON users')
+    op.execute('DROP FUNCTION users_bump_token_version()')
+    op.execute('DROP SEQUENCE users_token_version_seq')
+    op.drop_index(op.f('ix_users_token_version'), table_name='users')
+    op.drop_column('users', 'token_version')
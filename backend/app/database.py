@@ -1,45 +1,259 @@
 from __future__ import annotations
 
+import logging
 import os
-from pathlib import Path
+import time
+from dataclasses import dataclass
 from typing import TYPE_CHECKING, Annotated, Any
 
 from alembic.command import upgrade
 from alembic.config import Config
-from fastapi import Depends
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from alembic.script import ScriptDirectory
+from fastapi import Depends, Request
+from pydantic import BaseModel
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from app.metrics import instrument_engine
+from app.nplusone import NPlusOneDetector
 
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import AsyncGenerator
+
+    from sqlalchemy import Connection
+
+
+ASYNC_DRIVER = 'postgresql+asyncpg'
+# Clave del pg_advisory_lock que serializa las migraciones entre procesos
+MIGRATION_LOCK_KEY = 0x57465F6D6967
+# Conexiones que pueden abrir entre todos los workers: max_connections de PostgreSQL es 100 por
+# defecto y se dejan algunas libres para las migraciones, las herramientas y psql
+CONNECTION_BUDGET = 80
+
+logger = logging.getLogger(__name__)
+
+
+def database_url(host: str | None = None) -> str:
+    host = host or os.getenv('DB_HOST', 'database')
+    db_user = os.environ['DB_USER']
+    db_pass = os.environ['DB_PASS']
+    db_name = os.environ['DB_NAME']
+
+    return f'postgresql://{db_user}:{db_pass}@{host}:5432/{db_name}'
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    size: int = 5
+    max_overflow: int = 10
+    timeout: float = 30
+    recycle: int = 1800
+    pre_ping: bool = True
+    statement_timeout_ms: int = 0
+
+    @classmethod
+    def from_env(cls) -> PoolSettings:
+        """Ajustes del pool de este proceso.
+
+        Cada worker tiene su propio pool, así que `size + max_overflow` se recorta para que entre todos
+        (WEB_CONCURRENCY) no pasen de DB_MAX_CONNECTIONS conexiones.
+        """
+        workers = max(1, int(os.getenv('WEB_CONCURRENCY', '1')))
+        per_worker = max(1, int(os.getenv('DB_MAX_CONNECTIONS', str(CONNECTION_BUDGET))) // workers)
+        size = int(os.getenv('DB_POOL_SIZE', str(cls.size)))
+        max_overflow = int(os.getenv('DB_POOL_MAX_OVERFLOW', str(cls.max_overflow)))
+        if size + max_overflow > per_worker:
+            logger.warning(
+                'Pool %d + %d overflow exceeds %d connections per worker (%d workers): trimmed',
+                size, max_overflow, per_worker, workers,
+            )
+            size = min(size, per_worker)
+            max_overflow = per_worker - size
+
+        return cls(
+            size=size,
+            max_overflow=max_overflow,
+            timeout=float(os.getenv('DB_POOL_TIMEOUT', str(cls.timeout))),
+            recycle=int(os.getenv('DB_POOL_RECYCLE', str(cls.recycle))),
+            pre_ping=os.getenv('DB_POOL_PRE_PING', '1').lower() not in ('0', 'false', 'no'),
+            statement_timeout_ms=int(os.getenv('DB_STATEMENT_TIMEOUT', str(cls.statement_timeout_ms))),
+        )
+
+
+class PoolStats(BaseModel):
+    size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    overflow: int
+    acquisitions: int
+    timeouts: int
+    wait_avg_ms: float
+    wait_max_ms: float
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """QueuePool que mide cuánto se espera para obtener una conexión."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.acquisitions += 1
+            self.wait_total += elapsed
+            self.wait_max = max(self.wait_max, elapsed)
+
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            size=self.size(),
+            max_overflow=self._max_overflow,
+            checked_out=self.checkedout(),
+            idle=self.checkedin(),
+            # overflow() es negativo mientras no se ha llenado el pool
+            overflow=max(0, self.overflow()),
+            acquisitions=self.acquisitions,
+            timeouts=self.timeouts,
+            wait_avg_ms=self.wait_total / self.acquisitions * 1000 if self.acquisitions else 0.0,
+            wait_max_ms=self.wait_max * 1000,
+        )
+
+
+def alembic_config(db_url: str) -> Config:
+    config = Config(os.path.join(os.getcwd(), 'alembic', 'alembic.ini'))
+    config.set_main_option('script_location', 'alembic/alembic')
+    config.set_main_option('sqlalchemy.url', db_url.replace('%', '%%'))
+    return config
+
+
+def current_revisions(connection: Connection) -> set[str]:
+    """Revisiones aplicadas según alembic_version (vacío si la base de datos está sin inicializar)."""
+    try:
+        return set(connection.scalars(text('SELECT version_num FROM alembic_version')))
+    except ProgrammingError:
+        return set()
+    finally:
+        connection.rollback()
 
 
 class Database:
     base = declarative_base()
-    _session_maker: sessionmaker
+    engine: AsyncEngine
+    _session_maker: async_sessionmaker[AsyncSession]
+    # Solo en desarrollo y pruebas (NPLUSONE=log|raise)
+    _nplusone: NPlusOneDetector | None = None
 
     @classmethod
-    def init(cls, db_url: str) -> None:
-        engine = create_engine(db_url)
-        cls._session_maker = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-        alembic_path = os.path.join(os.getcwd(), "alembic", "alembic.ini")
-        config = Config(alembic_path)
+    def init(cls, db_url: str, pool: PoolSettings | None = None) -> None:
+        pool = pool or PoolSettings.from_env()
 
-        # Ajustar el script_location si es necesario
-        config.set_main_option("script_location", "alembic/alembic")
-        config.set_main_option("sqlalchemy.url", db_url.replace('%', '%%'))
+        server_settings = {}
+        if pool.statement_timeout_ms:
+            server_settings['statement_timeout'] = str(pool.statement_timeout_ms)
 
-        upgrade(config, 'head')
+        cls.engine = create_async_engine(
+            make_url(db_url).set(drivername=ASYNC_DRIVER),
+            poolclass=TimedQueuePool,
+            pool_size=pool.size,
+            max_overflow=pool.max_overflow,
+            pool_timeout=pool.timeout,
+            pool_recycle=pool.recycle,
+            # Descarta conexiones muertas (p. ej. tras reiniciar PostgreSQL) antes de entregarlas
+            pool_pre_ping=pool.pre_ping,
+            connect_args={'server_settings': server_settings},
+        )
+        instrument_engine(cls.engine.sync_engine)
+        # expire_on_commit=False: con AsyncSession no se puede recargar un atributo de forma implícita
+        cls._session_maker = async_sessionmaker(cls.engine, autoflush=False, expire_on_commit=False)
+        cls._nplusone = NPlusOneDetector.from_env()
 
     @classmethod
-    def get_session(cls) -> Generator[Session | Any, Any, None]:
-        db = cls._session_maker()
+    def migrate(cls, db_url: str) -> None:
+        """Lleva el esquema a la última revisión de Alembic.
+
+        Si `alembic_version` ya está en head no se carga el entorno de Alembic. Si hay que migrar, se
+        hace bajo un advisory lock: con varios procesos arrancando a la vez solo uno aplica las
+        migraciones y el resto espera y encuentra el esquema ya actualizado.
+        """
+        start = time.perf_counter()
+        config = alembic_config(db_url)
+        heads = set(ScriptDirectory.from_config(config).get_heads())
+        scripts_loaded = time.perf_counter()
+
+        # Alembic sigue usando el driver síncrono (psycopg2)
+        engine = create_engine(db_url, poolclass=NullPool)
         try:
-            yield db
+            with engine.connect() as connection:
+                current = current_revisions(connection)
+                checked = time.perf_counter()
+                if current == heads:
+                    logger.info(
+                        'Schema up to date (%s): scripts %.1f ms, version check %.1f ms',
+                        ', '.join(sorted(heads)), (scripts_loaded - start) * 1000, (checked - scripts_loaded) * 1000,
+                    )
+                    return
+
+                connection.execute(text('SELECT pg_advisory_lock(:key)'), {'key': MIGRATION_LOCK_KEY})
+                connection.commit()
+                locked = time.perf_counter()
+                try:
+                    # Mientras se esperaba el lock otro proceso ha podido migrar
+                    current = current_revisions(connection)
+                    if current != heads:
+                        with connection.begin():
+                            config.attributes['connection'] = connection
+                            upgrade(config, 'head')
+                finally:
+                    connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': MIGRATION_LOCK_KEY})
+                    connection.commit()
         finally:
-            db.close()
+            engine.dispose()
+
+        if current == heads:
+            logger.info(
+                'Schema upgraded by another process while waiting %.1f ms for the lock', (locked - checked) * 1000,
+            )
+            return
+
+        logger.info(
+            'Schema upgraded %s -> %s: scripts %.1f ms, version check %.1f ms, lock wait %.1f ms, upgrade %.1f ms',
+            ', '.join(sorted(current)) or 'base', ', '.join(sorted(heads)),
+            (scripts_loaded - start) * 1000, (checked - scripts_loaded) * 1000,
+            (locked - checked) * 1000, (time.perf_counter() - locked) * 1000,
+        )
+
+    @classmethod
+    def pool_stats(cls) -> PoolStats:
+        return cls.engine.pool.stats()
+
+    @classmethod
+    def new_session(cls) -> AsyncSession:
+        return cls._session_maker()
+
+    @classmethod
+    async def get_session(cls, request: Request) -> AsyncGenerator[AsyncSession, None]:
+        async with cls.new_session() as db:
+            if cls._nplusone is not None:
+                route = request.scope.get('route')
+                where = f'{request.method} {getattr(route, "path", request.url.path)} ({getattr(route, "name", "?")})'
+                cls._nplusone.watch(db, where)
+            yield db
 
 
-DBSession = Annotated[Session, Depends(Database.get_session)]
+DBSession = Annotated[AsyncSession, Depends(Database.get_session)]
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Annotated
+
+from fastapi import Depends, Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database import DBSession  # noqa: TC001
+from app.models.resource_version import ResourceVersion
+from app.routers.auth import AutoUser  # noqa: TC001
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine, Iterable
+    from typing import Any
+
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+ROUTINES = 'routines'
+DIETS = 'diets'
+EXERCISES = 'exercises'
+
+# owner_id del contador global de cada recurso (los ids de usuario empiezan en 1)
+EVERYONE = 0
+
+# Respuestas por usuario: el navegador puede guardarlas, pero tiene que revalidarlas siempre
+CACHE_CONTROL = 'private, no-cache'
+
+
+# -------------------------------------------------------------------
+# Escritura: cada cambio sube la versión de los usuarios afectados
+# -------------------------------------------------------------------
+async def bump(db: AsyncSession, scope: str, owner_ids: Iterable[int | None]) -> None:
+    """Sube la versión de `scope` para esos usuarios (EVERYONE: para todos), en la transacción en curso."""
+    # Ordenados: dos transacciones que suben los mismos contadores los bloquean en el mismo orden
+    owners = sorted({owner_id for owner_id in owner_ids if owner_id is not None})
+    if not owners:
+        return
+
+    statement = insert(ResourceVersion).values([
+        {'scope': scope, 'owner_id': owner_id, 'version': 1} for owner_id in owners
+    ])
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[ResourceVersion.scope, ResourceVersion.owner_id],
+        set_={'version': ResourceVersion.version + 1, 'updated_at': func.now()},
+    ))
+
+
+# -------------------------------------------------------------------
+# Lectura: GET condicional con If-None-Match
+# -------------------------------------------------------------------
+@dataclass(frozen=True)
+class Validator:
+    etag: str
+    not_modified: bool
+
+    def apply(self, response: Response) -> Response:
+        response.headers['ETag'] = self.etag
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        response.headers['Vary'] = 'Authorization'
+        return response
+
+    def not_modified_response(self) -> Response:
+        return self.apply(Response(status_code=status.HTTP_304_NOT_MODIFIED))
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Comparación débil (RFC 9110): se ignora el prefijo W/."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    opaque = etag.removeprefix('W/')
+    return any(tag.strip().removeprefix('W/') == opaque for tag in if_none_match.split(','))
+
+
+def conditional(scope: str, *, per_user: bool = True) -> Callable[..., Coroutine[Any, Any, Validator]]:
+    """Dependencia que calcula la ETag de `scope` para el usuario y la compara con If-None-Match.
+
+    Solo consulta resource_versions (clave primaria): si el cliente ya tiene la versión actual, el
+    endpoint responde 304 sin cargar ni serializar nada. La versión se lee antes que los datos, así que
+    una escritura concurrente como mucho hace que la ETag sea más antigua que la respuesta, nunca al revés.
+    """
+    async def validator(request: Request, db: DBSession, current_user: AutoUser) -> Validator:
+        owners = [EVERYONE, current_user.user_id] if per_user else [EVERYONE]
+        versions = dict((await db.execute(
+            select(ResourceVersion.owner_id, ResourceVersion.version)
+            .where(ResourceVersion.scope == scope, ResourceVersion.owner_id.in_(owners)),
+        )).all())
+
+        # La respuesta depende también de la URL (página, filtros) y del rol (entrenador o cliente)
+        variant = f'{scope}|{current_user.user_id}|{current_user.is_admin}|{request.url.path}?{request.url.query}'
+        digest = hashlib.blake2b(variant.encode(), digest_size=8).hexdigest()
+        etag = f'W/"{"-".join(str(versions.get(owner, 0)) for owner in owners)}-{digest}"'
+
+        return Validator(etag=etag, not_modified=etag_matches(request.headers.get('If-None-Match'), etag))
+
+    return validator
+
+
+RoutinesValidator = Annotated[Validator, Depends(conditional(ROUTINES))]
+DietsValidator = Annotated[Validator, Depends(conditional(DIETS))]
+ExercisesValidator = Annotated[Validator, Depends(conditional(EXERCISES, per_user=False))]
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import cache
+from typing import TYPE_CHECKING, Any, Protocol
+
+from fatsecret import Fatsecret
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Float, Integer, column, delete, func, literal, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import insert
+
+from app.cache import CacheStats, TTLCache
+from app.database import Database
+from app.etags import DIETS, EVERYONE, bump
+from app.models.food import Food
+from app.models.food_search_cache import FoodSearchCache
+from app.nutrition import MACROS, refresh_foods
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Cada cuántas escrituras se borran de la tabla las búsquedas caducadas
+PURGE_EVERY = 100
+
+
+class FoodData(BaseModel):
+    # id del alimento en FatSecret (None en los alimentos locales que no vienen de allí)
+    id: int | None = None
+    name: str
+    serving: str
+    calories: float
+    fats: float
+    carbs: float
+    protein: float
+    url: str
+    # Igual que id: es la clave con la que los alimentos de FatSecret se guardan en foods
+    external_id: int | None = None
+    # id en la tabla foods (None en los resultados de FatSecret)
+    food_id: int | None = None
+
+    model_config = {"from_attributes": True}
+
+    @classmethod
+    def from_description(cls, data: dict, food_description: str):
+        serving, contents = food_description.split(" - ", maxsplit=1)
+        contents = contents.split(" | ", maxsplit=3)
+        return cls(
+            id=int(data['food_id']),
+            external_id=int(data['food_id']),
+            name=data['food_name'],
+            url=data['food_url'],
+            serving=serving,
+            calories=float(contents[0][10:-4]),
+            fats=float(contents[1][5:-1]),
+            carbs=float(contents[2][7:-1]),
+            protein=float(contents[3][9:-1])
+        )
+
+
+food_list_adapter = TypeAdapter(list[FoodData])
+
+
+def food_data(food: Food) -> FoodData:
+    return FoodData(
+        id=food.external_id,
+        name=food.name,
+        serving=food.serving,
+        calories=food.calories,
+        fats=food.fats,
+        carbs=food.carbs,
+        protein=food.protein,
+        url=food.url,
+        external_id=food.external_id,
+        food_id=food.id,
+    )
+
+
+class FoodSearchClient(Protocol):
+    """Lo que se usa del cliente de FatSecret; permite sustituirlo por uno local en pruebas."""
+
+    def foods_search(self, search_expression: str) -> list[dict[str, Any]] | dict[str, Any] | None: ...
+
+
+class FoodSearchStats(BaseModel):
+    memory: CacheStats
+    local_hits: int
+    database_hits: int
+    upstream_calls: int
+    coalesced: int
+
+
+@dataclass(frozen=True)
+class FoodSearchSettings:
+    ttl: float = 24 * 60 * 60
+    memory_size: int = 512
+    memory_ttl: float = 300
+    # Si la búsqueda local devuelve al menos local_min_results alimentos no se consulta FatSecret
+    local_min_results: int = 5
+    local_limit: int = 20
+
+    @classmethod
+    def from_env(cls) -> FoodSearchSettings:
+        return cls(
+            ttl=float(os.getenv('FOOD_SEARCH_CACHE_TTL', str(cls.ttl))),
+            memory_size=int(os.getenv('FOOD_SEARCH_CACHE_SIZE', str(cls.memory_size))),
+            memory_ttl=float(os.getenv('FOOD_SEARCH_MEMORY_TTL', str(cls.memory_ttl))),
+            local_min_results=int(os.getenv('FOOD_LOCAL_MIN_RESULTS', str(cls.local_min_results))),
+            local_limit=int(os.getenv('FOOD_LOCAL_LIMIT', str(cls.local_limit))),
+        )
+
+
+def normalize_query(query: str) -> str:
+    return ' '.join(query.lower().split())
+
+
+class FoodSearchService:
+    """Búsqueda de alimentos: primero en la tabla foods y, si no basta, en FatSecret con dos niveles de caché.
+
+    La búsqueda local usa el índice trigram (GiST) de foods.name. Para FatSecret se mira una LRU en memoria y después
+    la tabla food_search_cache; solo si ambas fallan se llama a la API. Las búsquedas idénticas simultáneas
+    comparten una única llamada.
+    """
+
+    def __init__(self, client: FoodSearchClient, settings: FoodSearchSettings) -> None:
+        self._client = client
+        self._settings = settings
+        self._ttl = timedelta(seconds=settings.ttl)
+        self._memory: TTLCache[str, list[FoodData]] = TTLCache(
+            maxsize=settings.memory_size,
+            ttl=min(settings.ttl, settings.memory_ttl),
+        )
+        self._in_flight: dict[str, asyncio.Task[list[FoodData]]] = {}
+
+        self._local_hits = 0
+        self._database_hits = 0
+        self._upstream_calls = 0
+        self._coalesced = 0
+        self._writes = 0
+
+    @classmethod
+    def from_env(cls) -> FoodSearchService:
+        return cls(
+            client=Fatsecret(os.environ['CONSUMER_KEY'], os.environ['CONSUMER_SECRET']),
+            settings=FoodSearchSettings.from_env(),
+        )
+
+    async def search(self, query: str, db: AsyncSession) -> list[FoodData]:
+        key = normalize_query(query)
+
+        local = await self._search_local(db, key)
+        if len(local) >= self._settings.local_min_results:
+            self._local_hits += 1
+            return local
+
+        remote = await self._search_remote(key)
+        known_names = {food.name.lower() for food in local}
+        return local + [food for food in remote if food.name.lower() not in known_names]
+
+    async def _search_local(self, db: AsyncSession, key: str) -> list[FoodData]:
+        # <% filtra por word_similarity y <<-> ordena por su distancia: con el índice GiST ix_foods_name_trgm
+        # Postgres devuelve directamente los local_limit más parecidos sin ordenar todas las coincidencias
+        foods = await db.scalars(
+            select(Food)
+            .where(literal(key).op('<%')(Food.name))
+            .order_by(literal(key).op('<<->')(Food.name))
+            .limit(self._settings.local_limit),
+        )
+
+        return [food_data(food) for food in foods]
+
+    async def _search_remote(self, key: str) -> list[FoodData]:
+        results = self._memory.get(key)
+        if results is not None:
+            return results
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self._coalesced += 1
+
+        # shield: si una petición se cancela, las demás que esperan la misma búsqueda siguen adelante
+        return await asyncio.shield(task)
+
+    def stats(self) -> FoodSearchStats:
+        return FoodSearchStats(
+            memory=self._memory.stats(),
+            local_hits=self._local_hits,
+            database_hits=self._database_hits,
+            upstream_calls=self._upstream_calls,
+            coalesced=self._coalesced,
+        )
+
+    async def _load(self, key: str) -> list[FoodData]:
+        async with Database.new_session() as db:
+            results = await self._load_stored(db, key)
+            if results is None:
+                results = await self._fetch(key)
+                await self._update_foods(db, results)
+                await self._store(db, key, results)
+
+        self._memory.set(key, results)
+        return results
+
+    async def _load_stored(self, db: AsyncSession, key: str) -> list[FoodData] | None:
+        stored = await db.scalar(
+            select(FoodSearchCache.results)
+            .where(FoodSearchCache.query == key, FoodSearchCache.expires_at > func.now()),
+        )
+        if stored is None:
+            return None
+
+        self._database_hits += 1
+        return food_list_adapter.validate_python(stored)
+
+    async def _fetch(self, key: str) -> list[FoodData]:
+        self._upstream_calls += 1
+        # El cliente de FatSecret es síncrono (requests): se ejecuta en un hilo
+        results = await asyncio.to_thread(self._client.foods_search, key)
+        if not results:
+            return []
+        if isinstance(results, dict):
+            results = [results]
+
+        return [FoodData.from_description(f, f['food_description']) for f in results]
+
+    async def _update_foods(self, db: AsyncSession, results: list[FoodData]) -> None:
+        """Pone al día las macros de los alimentos ya guardados con las que acaba de devolver FatSecret.
+
+        Es la única forma de cambiar las macros de un alimento de FatSecret: al añadirlo a una comida se
+        usan las guardadas, no las que manda el cliente. Si alguna cambia, se recalculan las comidas que
+        lo usan.
+        """
+        fresh_macros = {food.external_id: food for food in results if food.external_id is not None}
+        if not fresh_macros:
+            return
+
+        fresh = values(
+            column('external_id', Integer), *(column(macro, Float) for macro in MACROS), name='fresh',
+        ).data([
+            (external_id, *(getattr(food, macro) for macro in MACROS))
+            for external_id, food in fresh_macros.items()
+        ])
+        food_ids = (await db.scalars(
+            update(Food)
+            .where(
+                Food.external_id == fresh.c.external_id,
+                tuple_(*(getattr(Food, macro) for macro in MACROS))
+                .is_distinct_from(tuple_(*(fresh.c[macro] for macro in MACROS))),
+            )
+            .values({macro: fresh.c[macro] for macro in MACROS})
+            .returning(Food.id),
+        )).all()
+        if food_ids:
+            await refresh_foods(db, food_ids)
+            await bump(db, DIETS, [EVERYONE])
+
+    async def _store(self, db: AsyncSession, key: str, results: list[FoodData]) -> None:
+        values = {
+            'query': key,
+            'results': food_list_adapter.dump_python(results, mode='json'),
+            'expires_at': func.now() + self._ttl,
+        }
+        await db.execute(
+            insert(FoodSearchCache)
+            .values(values)
+            .on_conflict_do_update(index_elements=[FoodSearchCache.query], set_=values),
+        )
+
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            await db.execute(delete(FoodSearchCache).where(FoodSearchCache.expires_at <= func.now()))
+
+        await db.commit()
+
+
+@cache
+def get_food_search_service() -> FoodSearchService:
+    # Se crea al primer uso, dentro de cada worker
+    return FoodSearchService.from_env()
@@ -0,0 +1,202 @@
+"""Latencia por ruta y uso de la base de datos por petición, en formato de texto de Prometheus.
+
+MetricsMiddleware mide cada petición HTTP y guarda en un contextvar el contador de la petición en curso;
+los eventos del engine (instrument_engine, llamado desde Database.init) le suman cada sentencia SQL y su
+duración. Las métricas se acumulan en memoria, por ruta (la plantilla: /diets/{diet_id}) y no por URL,
+y solo se formatean cuando alguien pide GET /metrics.
+
+Cada worker tiene sus propios contadores: con varios procesos, cada scrape ve los de uno de ellos
+(la etiqueta `pid` permite distinguirlos).
+"""
+from __future__ import annotations
+
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+
+
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
+    from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Límites superiores (segundos) de los buckets de los histogramas
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+@dataclass
+class Histogram:
+    buckets: tuple[float, ...] = LATENCY_BUCKETS
+    counts: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    total: float = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+
+@dataclass
+class RouteMetrics:
+    latency: Histogram = field(default_factory=Histogram)
+    db_time: Histogram = field(default_factory=Histogram)
+    responses: dict[int, int] = field(default_factory=dict)
+    statements: int = 0
+
+
+@dataclass
+class RequestUsage:
+    statements: int = 0
+    db_time: float = 0.0
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+        # Sentencias fuera de una petición (arranque, scripts, tareas en segundo plano)
+        self.background = RequestUsage()
+
+    def record(self, method: str, route: str, status: int, elapsed: float, usage: RequestUsage) -> None:
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[method, route] = RouteMetrics()
+
+        metrics.latency.observe(elapsed)
+        metrics.db_time.observe(usage.db_time)
+        metrics.responses[status] = metrics.responses.get(status, 0) + 1
+        metrics.statements += usage.statements
+
+    def clear(self) -> None:
+        self.routes.clear()
+        self.background = RequestUsage()
+
+    def render(self) -> str:
+        lines: list[str] = []
+        pid = os.getpid()
+
+        def header(name: str, kind: str, description: str) -> None:
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def histogram(name: str, labels: str, histogram: Histogram) -> None:
+            cumulative = 0
+            for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts, strict=True):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{labels}}} {histogram.total}')
+            lines.append(f'{name}_count{{{labels}}} {cumulative}')
+
+        routes = sorted(self.routes.items())
+        labels = {key: f'pid="{pid}",method="{key[0]}",route="{escape(key[1])}"' for key, _ in routes}
+
+        header('http_requests_total', 'counter', 'Peticiones HTTP por ruta y código de estado.')
+        for key, metrics in routes:
+            for status, count in sorted(metrics.responses.items()):
+                lines.append(f'http_requests_total{{{labels[key]},status="{status}"}} {count}')
+
+        header('http_request_duration_seconds', 'histogram', 'Latencia de las peticiones HTTP por ruta.')
+        for key, metrics in routes:
+            histogram('http_request_duration_seconds', labels[key], metrics.latency)
+
+        header('db_request_duration_seconds', 'histogram', 'Tiempo en sentencias SQL por petición HTTP.')
+        for key, metrics in routes:
+            histogram('db_request_duration_seconds', labels[key], metrics.db_time)
+
+        header('db_statements_total', 'counter', 'Sentencias SQL ejecutadas por ruta.')
+        for key, metrics in routes:
+            lines.append(f'db_statements_total{{{labels[key]}}} {metrics.statements}')
+        lines.append(f'db_statements_total{{pid="{pid}",method="",route=""}} {self.background.statements}')
+
+        header('db_duration_seconds_total', 'counter', 'Tiempo total en sentencias SQL por ruta.')
+        for key, metrics in routes:
+            lines.append(f'db_duration_seconds_total{{{labels[key]}}} {metrics.db_time.total}')
+        lines.append(f'db_duration_seconds_total{{pid="{pid}",method="",route=""}} {self.background.db_time}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+registry = Registry()
+current_usage: ContextVar[RequestUsage | None] = ContextVar('current_usage', default=None)
+
+
+# -------------------------------------------------------------------
+# Middleware ASGI (sin BaseHTTPMiddleware: no envuelve el cuerpo de la respuesta)
+# -------------------------------------------------------------------
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        usage = RequestUsage()
+        token = current_usage.set(usage)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_usage.reset(token)
+            # El router de FastAPI deja en el scope la ruta que ha atendido la petición
+            route = scope.get('route')
+            registry.record(
+                scope['method'],
+                getattr(route, 'path', UNMATCHED_ROUTE),
+                status,
+                time.perf_counter() - start,
+                usage,
+            )
+
+
+# -------------------------------------------------------------------
+# Eventos del engine
+# -------------------------------------------------------------------
+def instrument_engine(engine: Engine) -> None:
+    """Cuenta las sentencias SQL y su duración en la petición en curso (o fuera de petición)."""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start(conn: Any, cursor: Any, statement: Any, parameters: Any, context: Any, executemany: bool) -> None:  # noqa: ARG001, FBT001
+        conn.info.setdefault('metrics_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _end(conn: Any, cursor: Any, statement: Any, parameters: Any, context: Any, executemany: bool) -> None:  # noqa: ARG001, FBT001
+        elapsed = time.perf_counter() - conn.info['metrics_start'].pop()
+        usage = current_usage.get() or registry.background
+        usage.statements += 1
+        usage.db_time += elapsed
+
+    @event.listens_for(engine, 'handle_error')
+    def _error(context: Any) -> None:
+        # Una sentencia que falla no llega a after_cursor_execute
+        if context.connection is not None and context.connection.info.get('metrics_start'):
+            context.connection.info['metrics_start'].pop()
+
+
+# -------------------------------------------------------------------
+# Endpoint
+# -------------------------------------------------------------------
+router = APIRouter(tags=['admin'])
+
+
+@router.get('/metrics', include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(registry.render(), media_type='text/plain; version=0.0.4')
@@ -0,0 +1,17 @@
+# Todos los modelos se registran al importar el paquete: las relaciones se declaran con el nombre de la
+# clase ('ExerciseProgress', 'FoodMeal'...) y SQLAlchemy solo las resuelve si la clase ya está cargada.
+from app.models import (  # noqa: F401
+    diet,
+    exercise,
+    exercise_progress,
+    food,
+    food_meal,
+    food_search_cache,
+    meal,
+    meal_nutrition,
+    resource_version,
+    revoked_user,
+    routine,
+    routine_exercise,
+    user,
+)
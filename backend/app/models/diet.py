@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, func
+from sqlalchemy.orm import query_expression, relationship
 
 from app.database import Database
 from app.models.user import User
@@ -9,6 +9,11 @@ from app.models.user import User
 
 class Diet(Database.base):
     __tablename__ = 'diets'
+    __table_args__ = (
+        # Listados paginados por entrenador o por cliente (WHERE <owner> = ? AND id > ? ORDER BY id)
+        Index('ix_diets_trainer_id_id', 'trainer_id', 'id'),
+        Index('ix_diets_client_id_id', 'client_id', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -16,4 +21,8 @@ class Diet(Database.base):
     client_id = Column(Integer, ForeignKey(User.id.expression))
     created_at = Column(DateTime, server_default=func.now())
 
-    meals = relationship('Meal', back_populates='diet')
+    # Totales de macros [calories, carbs, fats, protein]; solo se cargan con with_expression (app.nutrition)
+    nutrition = query_expression()
+
+    # Ordenadas por id, como los alimentos de cada comida: GET /diets (y su ETag) siempre en el mismo orden
+    meals = relationship('Meal', back_populates='diet', order_by='Meal.id')
@@ -1,4 +1,6 @@
-from sqlalchemy import Integer, Column, ForeignKey, Float
+import re
+
+from sqlalchemy import Integer, Column, DateTime, ForeignKey, Float, Index, func
 from sqlalchemy.orm import relationship
 
 from app.database import Database
@@ -6,13 +8,31 @@ from app.models.exercise import Exercise
 from app.models.user import User
 
 
+# Particiones mensuales (UTC) de exercise_progress: se crean y archivan con tools/progress_partitions.py,
+# fuera de Alembic. Lo que no cae en ninguna va a la partición por defecto.
+PARTITION_NAME = 'exercise_progress_{year:04d}_{month:02d}'
+DEFAULT_PARTITION = 'exercise_progress_default'
+_PARTITION_PATTERN = re.compile(r'exercise_progress_(\d{4})_(\d{2})|exercise_progress_default')
+
+
+def is_partition(table_name: str) -> bool:
+    return _PARTITION_PATTERN.fullmatch(table_name) is not None
+
+
 class ExerciseProgress(Database.base):
     __tablename__ = 'exercise_progress'
+    __table_args__ = (
+        # Series de un usuario y ejercicio por rango de fechas (app.routers.progress); cada partición tiene el suyo
+        Index('ix_exercise_progress_user_id_exercise_id_recorded_at', 'user_id', 'exercise_id', 'recorded_at'),
+        {'postgresql_partition_by': 'RANGE (recorded_at)'},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    exercise_id = Column(Integer, ForeignKey(Exercise.id.expression))
+    # La clave de partición tiene que formar parte de la clave primaria
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    exercise_id = Column(Integer, ForeignKey(Exercise.id.expression), index=True)
     user_id = Column(Integer, ForeignKey(User.id.expression))
     weight = Column(Float, nullable=True)
     repetitions = Column(Integer, nullable=True)
+    recorded_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False)
 
     exercise = relationship('Exercise', back_populates='progress')
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, Integer, String
+from sqlalchemy import BigInteger, Column, Float, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.database import Database
@@ -6,15 +6,21 @@ from app.database import Database
 
 class Food(Database.base):
     __tablename__ = 'foods'
+    __table_args__ = (
+        # Búsqueda local por nombre (similitud de palabras) con pg_trgm
+        Index('ix_foods_name_trgm', 'name', postgresql_using='gist', postgresql_ops={'name': 'gist_trgm_ops'}),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
     serving = Column(String, nullable=False)
     calories = Column(Float, default=0)
     carbs = Column(Float, default=0)
     fats = Column(Float, default=0)
     protein = Column(Float, default=0)
     url = Column(String, nullable=False)
+    # food_id de FatSecret: los alimentos que vienen de allí se deduplican por este id, no por nombre
+    external_id = Column(BigInteger, unique=True, index=True, nullable=True)
 
     food_meals = relationship(
         "FoodMeal",
@@ -8,8 +8,8 @@ class FoodMeal(Database.base):
     __tablename__ = 'food_meal'
 
     id = Column(Integer, primary_key=True)
-    food_id = Column(Integer, ForeignKey('foods.id'), nullable=False)
-    meal_id = Column(Integer, ForeignKey('meals.id'), nullable=False)
+    food_id = Column(Integer, ForeignKey('foods.id'), nullable=False, index=True)
+    meal_id = Column(Integer, ForeignKey('meals.id'), nullable=False, index=True)
     servings = Column(Integer, nullable=False)
 
     food = relationship("Food", back_populates="food_meals", overlaps="meals,foods")
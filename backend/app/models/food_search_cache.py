@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.database import Database
+
+
+class FoodSearchCache(Database.base):
+    __tablename__ = 'food_search_cache'
+
+    query = Column(String, primary_key=True)
+    results = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from sqlalchemy import Column, Float, ForeignKey, Integer, String
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import query_expression, relationship
 
 from app.database import Database
 from app.models.diet import Diet
@@ -11,16 +11,20 @@ class Meal(Database.base):
     __tablename__ = 'meals'
 
     id = Column(Integer, primary_key=True, index=True)
-    diet_id = Column(Integer, ForeignKey(Diet.id.expression))
+    diet_id = Column(Integer, ForeignKey(Diet.id.expression), index=True)
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
 
+    # Totales de macros [calories, carbs, fats, protein]; solo se cargan con with_expression (app.nutrition)
+    nutrition = query_expression()
+
     diet = relationship(
         'Diet',
         back_populates='meals'
     )
     food_meals = relationship(
         'FoodMeal',
-        back_populates='meal'
+        back_populates='meal',
+        order_by='FoodMeal.id',
     )
 
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, func
+
+from app.database import Database
+from app.models.diet import Diet
+from app.models.meal import Meal
+
+
+class MealNutrition(Database.base):
+    """Totales de macros precalculados por comida (ver app.nutrition)."""
+
+    __tablename__ = 'meal_nutrition'
+
+    meal_id = Column(Integer, ForeignKey(Meal.id.expression, ondelete='CASCADE'), primary_key=True)
+    diet_id = Column(Integer, ForeignKey(Diet.id.expression, ondelete='CASCADE'), nullable=True, index=True)
+    calories = Column(Float, nullable=False, default=0)
+    carbs = Column(Float, nullable=False, default=0)
+    fats = Column(Float, nullable=False, default=0)
+    protein = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
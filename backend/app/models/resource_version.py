@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, func
+
+from app.database import Database
+
+
+class ResourceVersion(Database.base):
+    """Contador de cambios por recurso y usuario, para las ETag de los listados (ver app.etags).
+
+    owner_id 0 es el contador global del recurso: afecta a todos los usuarios.
+    """
+
+    __tablename__ = 'resource_versions'
+
+    scope = Column(String, primary_key=True)
+    owner_id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
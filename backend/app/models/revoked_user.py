@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, func
+
+from app.database import Database
+
+
+class RevokedUser(Database.base):
+    """Usuarios borrados: los rellena un trigger de users, con una versión de users_token_version_seq.
+
+    Sus tokens dejan de aceptarse cuando cada proceso se pone al día (ver auth.TokenVersions).
+    """
+
+    __tablename__ = 'revoked_users'
+
+    # Sin clave ajena: el usuario ya no existe
+    user_id = Column(Integer, primary_key=True)
+    token_version = Column(BigInteger, nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import relationship
 
 from app.database import Database
@@ -9,6 +9,11 @@ from app.models.user import User
 
 class Routine(Database.base):
     __tablename__ = 'routines'
+    __table_args__ = (
+        # Listados paginados por entrenador o por cliente (WHERE <owner> = ? AND id > ? ORDER BY id)
+        Index('ix_routines_trainer_id_id', 'trainer_id', 'id'),
+        Index('ix_routines_client_id_id', 'client_id', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -19,4 +24,5 @@ class Routine(Database.base):
 
     exercises = relationship('Exercise', back_populates='routine')
 
-    routine_exercises = relationship("RoutineExercise", back_populates="routine")
+    # Ordenadas por id: el cuerpo de GET /routines (y su ETag) no depende del orden en que PostgreSQL devuelva las filas
+    routine_exercises = relationship("RoutineExercise", back_populates="routine", order_by="RoutineExercise.id")
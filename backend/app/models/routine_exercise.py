@@ -10,7 +10,7 @@ class RoutineExercise(Database.base):
 
     id = Column(Integer, primary_key=True)
     exercise_id = Column(Integer, ForeignKey('exercises.id'), nullable=False)
-    routine_id = Column(Integer, ForeignKey('routines.id'), nullable=False)
+    routine_id = Column(Integer, ForeignKey('routines.id'), nullable=False, index=True)
 
     min_repeats = Column(Integer)
     max_repeats = Column(Integer)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Boolean, Column, Date, Float, Integer, String
+from sqlalchemy import BigInteger, Boolean, Column, Date, Float, Integer, String
 
 from app.database import Database
 
@@ -22,3 +22,7 @@ class User(Database.base):
     height = Column(Float, nullable=True)
     weight = Column(Float, nullable=True)
     gender = Column(String, nullable=True)
+
+    # Lo pone un trigger (sacado de una secuencia global) cada vez que cambia un dato del perfil que va
+    # firmado en los tokens: los emitidos con una versión anterior dejan de usarse sin consultar (ver auth)
+    token_version = Column(BigInteger, nullable=False, server_default='0', index=True)
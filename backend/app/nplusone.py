@@ -0,0 +1,84 @@
+"""Detector de N+1 para desarrollo y pruebas.
+
+Con NPLUSONE=log (o raise), cada sesión que entrega Database.get_session cuenta las sentencias que
+ejecuta durante la petición. Cuando la misma sentencia (mismo SQL, con otros parámetros) se repite
+NPLUSONE_THRESHOLD veces, se avisa en el log o se lanza NPlusOneError con la ruta, la sentencia y,
+si es una carga perezosa, la relación que la ha disparado (p. ej. Diet.meals).
+
+Solo se cuentan las consultas (SELECT). Las cargas de selectinload no cuentan: se repiten por diseño,
+una por cada lote de filas.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from sqlalchemy import event
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import ORMExecuteState
+
+
+logger = logging.getLogger(__name__)
+
+MODES = ('log', 'raise')
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class NPlusOneDetector:
+    mode: str
+    threshold: int = 3
+
+    @classmethod
+    def from_env(cls) -> NPlusOneDetector | None:
+        """El detector configurado con NPLUSONE y NPLUSONE_THRESHOLD, o None si está desactivado."""
+        mode = os.getenv('NPLUSONE', '').lower()
+        if not mode:
+            return None
+        if mode not in MODES:
+            msg = f'NPLUSONE must be one of {", ".join(MODES)}, got {mode!r}'
+            raise ValueError(msg)
+
+        return cls(mode=mode, threshold=int(os.getenv('NPLUSONE_THRESHOLD', str(cls.threshold))))
+
+    def watch(self, session: AsyncSession, where: str) -> None:
+        """Vigila las sentencias ORM de una sesión; `where` identifica la petición en los informes."""
+        counts: Counter[tuple[str, str | None]] = Counter()
+
+        def on_execute(orm_execute_state: ORMExecuteState) -> None:
+            # Solo cuentan las lecturas: los INSERT por lotes del ORM ni siquiera se pueden compilar sueltos
+            if not orm_execute_state.is_select:
+                return
+
+            lazy_attribute = None
+            if orm_execute_state.is_relationship_load:
+                if orm_execute_state.lazy_loaded_from is None:
+                    return
+                # El último elemento de la ruta del loader es la relación (Diet.meals)
+                lazy_attribute = str(orm_execute_state.loader_strategy_path[-1].class_attribute)
+
+            dialect = orm_execute_state.session.get_bind().dialect
+            sql = str(orm_execute_state.statement.compile(dialect=dialect))
+            key = (sql, lazy_attribute)
+            counts[key] += 1
+            if counts[key] == self.threshold:
+                self.report(where, sql, lazy_attribute)
+
+        event.listen(session.sync_session, 'do_orm_execute', on_execute)
+
+    def report(self, where: str, sql: str, lazy_attribute: str | None) -> None:
+        cause = f'lazy load of {lazy_attribute}' if lazy_attribute else 'repeated statement'
+        msg = f'N+1 in {where}: {cause} executed {self.threshold} times\n{sql}'
+        if self.mode == 'raise':
+            raise NPlusOneError(msg)
+
+        logger.warning(msg)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import array, insert
+
+from app.models.diet import Diet
+from app.models.food import Food
+from app.models.food_meal import FoodMeal
+from app.models.meal import Meal
+from app.models.meal_nutrition import MealNutrition
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping, Sequence
+
+    from sqlalchemy import ColumnElement, Select
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+MACROS = ('calories', 'carbs', 'fats', 'protein')
+
+
+class NutritionTotals(BaseModel):
+    calories: float = 0.0
+    carbs: float = 0.0
+    fats: float = 0.0
+    protein: float = 0.0
+
+    @classmethod
+    def from_values(cls, values: Sequence[float] | None) -> NutritionTotals:
+        """Construye los totales a partir de un array en el orden de MACROS (None si la comida no tiene totales)."""
+        if values is None:
+            return cls()
+
+        return cls(**dict(zip(MACROS, values, strict=True)))
+
+    @staticmethod
+    def row(values: Sequence[float] | None) -> dict[str, float]:
+        """Como from_values, pero como diccionario: para validar un árbol entero de una vez."""
+        return dict.fromkeys(MACROS, 0.0) if values is None else dict(zip(MACROS, values, strict=True))
+
+
+# -------------------------------------------------------------------
+# Lectura: totales precalculados en meal_nutrition
+# -------------------------------------------------------------------
+def meal_nutrition() -> ColumnElement[list[float]]:
+    """Totales de cada comida (búsqueda por clave primaria), para `with_expression(Meal.nutrition, ...)`."""
+    return (
+        select(array([getattr(MealNutrition, macro) for macro in MACROS]))
+        .where(MealNutrition.meal_id == Meal.id)
+        .correlate(Meal)
+        .scalar_subquery()
+    )
+
+
+def diet_nutrition() -> ColumnElement[list[float]]:
+    """Totales de cada dieta: suma de sus filas de meal_nutrition (índice por diet_id)."""
+    return (
+        select(array([func.coalesce(func.sum(getattr(MealNutrition, macro)), 0.0) for macro in MACROS]))
+        .where(MealNutrition.diet_id == Diet.id)
+        .correlate(Diet)
+        .scalar_subquery()
+    )
+
+
+# -------------------------------------------------------------------
+# Escritura: mantenimiento incremental de meal_nutrition
+# -------------------------------------------------------------------
+async def init_meal(db: AsyncSession, meal: Meal) -> None:
+    """Fila a cero para una comida recién creada."""
+    await db.execute(insert(MealNutrition).values(meal_id=meal.id, diet_id=meal.diet_id).on_conflict_do_nothing())
+
+
+async def add_foods(db: AsyncSession, meal: Meal, foods: Iterable[tuple[Mapping[str, float], int]]) -> None:
+    """Suma a los totales de la comida lo que aportan los alimentos nuevos: pares (macros, raciones)."""
+    delta = dict.fromkeys(MACROS, 0.0)
+    for macros, servings in foods:
+        for macro in MACROS:
+            delta[macro] += servings * macros[macro]
+    statement = insert(MealNutrition).values(meal_id=meal.id, diet_id=meal.diet_id, **delta)
+
+    # El incremento se hace en PostgreSQL, así que dos peticiones simultáneas no se pisan
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[MealNutrition.meal_id],
+        set_={
+            **{macro: getattr(MealNutrition, macro) + getattr(statement.excluded, macro) for macro in MACROS},
+            'updated_at': func.now(),
+        },
+    ))
+
+
+async def move_meals(db: AsyncSession, meal_ids: Iterable[int], diet_id: int) -> None:
+    await db.execute(update(MealNutrition).where(MealNutrition.meal_id.in_(meal_ids)).values(diet_id=diet_id))
+
+
+async def refresh_foods(db: AsyncSession, food_ids: Iterable[int]) -> int:
+    """Recalcula las comidas que contienen esos alimentos (tras cambiar sus macros)."""
+    meal_ids = select(FoodMeal.meal_id).where(FoodMeal.food_id.in_(food_ids)).distinct()
+    return await refresh_meals(db, meal_ids)
+
+
+async def refresh_meals(db: AsyncSession, meal_ids: Iterable[int] | Select[tuple[int]] | None = None) -> int:
+    """Recalcula desde food_meal/foods las comidas indicadas (o todas) con un único INSERT ... SELECT.
+
+    Devuelve el número de comidas recalculadas.
+    """
+    totals = (
+        select(
+            Meal.id,
+            Meal.diet_id,
+            *(func.coalesce(func.sum(FoodMeal.servings * getattr(Food, macro)), 0.0) for macro in MACROS),
+        )
+        .select_from(Meal)
+        .outerjoin(FoodMeal, FoodMeal.meal_id == Meal.id)
+        .outerjoin(Food, Food.id == FoodMeal.food_id)
+        .group_by(Meal.id)
+    )
+    if meal_ids is not None:
+        totals = totals.where(Meal.id.in_(meal_ids))
+
+    statement = insert(MealNutrition).from_select(['meal_id', 'diet_id', *MACROS], totals)
+    result = await db.execute(statement.on_conflict_do_update(
+        index_elements=[MealNutrition.meal_id],
+        set_={
+            'diet_id': statement.excluded.diet_id,
+            **{macro: getattr(statement.excluded, macro) for macro in MACROS},
+            'updated_at': func.now(),
+        },
+    ))
+    return result.rowcount
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Annotated, Any, Generic, TypeVar
+
+from fastapi import Depends, Query
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, SerializeAsAny
+
+from app.responses import model_response
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterable, AsyncIterator, Callable, Sequence
+
+    from sqlalchemy import Select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import InstrumentedAttribute
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+ItemT = TypeVar('ItemT', bound=BaseModel)
+
+
+class Page(BaseModel, Generic[ItemT]):
+    # SerializeAsAny: una página construida sin parametrizar se serializa según el tipo real de cada elemento
+    items: list[SerializeAsAny[ItemT]]
+    next_after: int | None = None
+
+
+@dataclass(frozen=True)
+class PageParams:
+    limit: int
+    after: int | None
+    stream: bool
+
+
+def get_page_params(
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    after: Annotated[int | None, Query(ge=0, description='Cursor: id of the last item of the previous page')] = None,
+    stream: Annotated[bool, Query(description='Stream every remaining item as NDJSON instead of a page')] = False,
+) -> PageParams:
+    return PageParams(limit=limit, after=after, stream=stream)
+
+
+Pagination = Annotated[PageParams, Depends(get_page_params)]
+
+
+# -------------------------------------------------------------------
+# Keyset sobre la columna id
+# -------------------------------------------------------------------
+def keyset(statement: Select[Any], id_column: InstrumentedAttribute[Any], params: PageParams) -> Select[Any]:
+    if params.after is not None:
+        statement = statement.where(id_column > params.after)
+
+    statement = statement.order_by(None).order_by(id_column)
+    if params.stream:
+        return statement.execution_options(yield_per=STREAM_BATCH_SIZE)
+
+    # Se pide un elemento de más para saber si existe una página siguiente
+    return statement.limit(params.limit + 1)
+
+
+def build_page(rows: Sequence[Any], params: PageParams, to_item: Callable[[Any], ItemT]) -> Page[ItemT]:
+    next_after = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        next_after = rows[-1].id
+
+    return Page.model_construct(items=[to_item(row) for row in rows], next_after=next_after)
+
+
+def ndjson_response(rows: AsyncIterable[Any], to_item: Callable[[Any], BaseModel]) -> StreamingResponse:
+    async def lines() -> AsyncIterator[str]:
+        async for row in rows:
+            yield to_item(row).model_dump_json() + '\n'
+
+    return StreamingResponse(lines(), media_type='application/x-ndjson')
+
+
+async def paginate(
+    db: AsyncSession,
+    statement: Select[Any],
+    id_column: InstrumentedAttribute[Any],
+    params: PageParams,
+    to_item: Callable[[Any], ItemT],
+) -> Response:
+    statement = keyset(statement, id_column, params)
+    if params.stream:
+        # Cursor del lado del servidor: las filas llegan por lotes de STREAM_BATCH_SIZE
+        return ndjson_response(await db.stream_scalars(statement), to_item)
+
+    rows = (await db.scalars(statement)).all()
+    return model_response(build_page(rows, params, to_item))
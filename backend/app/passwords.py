@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Literal, TypeVar
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from pydantic import BaseModel
+from starlette import status
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+
+ExecutorKind = Literal['thread', 'process']
+ResultT = TypeVar('ResultT')
+
+
+# Funciones de módulo para que puedan enviarse también a un ProcessPoolExecutor
+def _hash(password: str) -> str:
+    return bcrypt_context.hash(password)
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return bcrypt_context.verify(password, hashed_password)
+
+
+class HasherStats(BaseModel):
+    executor: ExecutorKind
+    workers: int
+    max_queue: int
+    in_flight: int
+    queued: int
+    completed: int
+    rejected: int
+    latency_avg_ms: float
+    latency_max_ms: float
+
+
+class PasswordHasher:
+    """Ejecuta bcrypt fuera del event loop, en un pool con una cola acotada.
+
+    Cuando hay más de `workers + max_queue` operaciones pendientes se responde 503 con Retry-After
+    en lugar de seguir acumulando trabajo.
+    """
+
+    def __init__(self, executor: ExecutorKind, workers: int, max_queue: int, retry_after: int) -> None:
+        self.executor_kind = executor
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+
+        self._executor: Executor | None = None
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    @classmethod
+    def from_env(cls) -> PasswordHasher:
+        executor = os.getenv('PASSWORD_HASH_EXECUTOR', 'thread')
+        if executor not in ('thread', 'process'):
+            msg = f'PASSWORD_HASH_EXECUTOR must be "thread" or "process", got {executor!r}'
+            raise ValueError(msg)
+
+        return cls(
+            executor=executor,
+            workers=int(os.getenv('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1)))),
+            max_queue=int(os.getenv('PASSWORD_HASH_QUEUE', '32')),
+            retry_after=int(os.getenv('PASSWORD_HASH_RETRY_AFTER', '1')),
+        )
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(_verify, password, hashed_password)
+
+    def stats(self) -> HasherStats:
+        return HasherStats(
+            executor=self.executor_kind,
+            workers=self.workers,
+            max_queue=self.max_queue,
+            in_flight=self._in_flight,
+            queued=max(0, self._in_flight - self.workers),
+            completed=self._completed,
+            rejected=self._rejected,
+            latency_avg_ms=self._latency_total / self._completed * 1000 if self._completed else 0.0,
+            latency_max_ms=self._latency_max * 1000,
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> Executor:
+        # Se crea al primer uso y no al importar, para que cada worker tenga su propio pool
+        if self._executor is None:
+            if self.executor_kind == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+
+        return self._executor
+
+    async def _run(self, func: Callable[..., ResultT], *args: str) -> ResultT:
+        if self._in_flight >= self.workers + self.max_queue:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail='Too many concurrent authentication requests, try again later.',
+                headers={'Retry-After': str(self.retry_after)},
+            )
+
+        self._in_flight += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._in_flight -= 1
+            self._completed += 1
+            self._latency_total += elapsed
+            self._latency_max = max(self._latency_max, elapsed)
+
+
+password_hasher = PasswordHasher.from_env()
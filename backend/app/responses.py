@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from functools import cache
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+@cache
+def json_adapter(model_type: type[Any]) -> TypeAdapter[Any]:
+    return TypeAdapter(model_type)
+
+
+def model_response(content: BaseModel, status_code: int = 200) -> Response:
+    """Respuesta JSON serializada directamente por pydantic-core.
+
+    Con un `response_model`, FastAPI vuelca el modelo devuelto a dict, lo valida otra vez, lo pasa por
+    jsonable_encoder y lo codifica con `json`. El modelo ya está validado, así que aquí se pasa a bytes
+    en un solo paso. El endpoint debe mantener `response_model` para que el esquema OpenAPI no cambie.
+    """
+    return Response(
+        content=json_adapter(type(content)).dump_json(content),
+        status_code=status_code,
+        media_type='application/json',
+    )
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+from pydantic import BaseModel
+
+from app.cache import CacheStats  # noqa: TC001
+from app.database import Database, DBSession, PoolStats
+from app.etags import DIETS, EVERYONE, bump
+from app.food_search import FoodSearchStats, get_food_search_service
+from app.nutrition import refresh_meals
+from app.passwords import HasherStats, password_hasher
+from app.routers.auth import AutoAdminUser, user_cache
+
+
+router = APIRouter(
+    prefix='/admin',
+    tags=['admin'],
+)
+
+
+class NutritionRebuild(BaseModel):
+    meals: int
+
+
+class AdminStats(BaseModel):
+    database: PoolStats
+    password_hashing: HasherStats
+    user_cache: CacheStats
+    food_search: FoodSearchStats
+
+
+# ---------------------- Métricas internas ----------------------
+@router.get('/stats')
+async def get_stats(
+    current_user: AutoAdminUser,  # noqa: ARG001
+) -> AdminStats:
+    return AdminStats(
+        database=Database.pool_stats(),
+        password_hashing=password_hasher.stats(),
+        user_cache=user_cache.stats(),
+        food_search=get_food_search_service().stats(),
+    )
+
+
+# ---------------------- Reconstruir resumen nutricional ----------------------
+@router.post('/nutrition/rebuild')
+async def rebuild_nutrition(
+    db: DBSession,
+    current_user: AutoAdminUser,  # noqa: ARG001
+) -> NutritionRebuild:
+    """Recalcula meal_nutrition entero a partir de food_meal y foods (reparación)."""
+    meals = await refresh_meals(db)
+    await bump(db, DIETS, [EVERYONE])
+    await db.commit()
+    return NutritionRebuild(meals=meals)
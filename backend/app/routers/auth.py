@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import time
 from datetime import UTC, date, datetime, timedelta
 from enum import StrEnum
 from typing import TYPE_CHECKING, Annotated
@@ -8,16 +10,22 @@ from typing import TYPE_CHECKING, Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import event, false, select, true, union_all
+from sqlalchemy.orm import Session, object_session
 from starlette import status
 
+from app.cache import TTLCache
 from app.database import DBSession  # noqa: TC001
+from app.models.revoked_user import RevokedUser
 from app.models.user import User
+from app.passwords import password_hasher
 
 
 if TYPE_CHECKING:
-    from sqlalchemy.orm import Session
+    from sqlalchemy.engine import Connection
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Mapper, ORMExecuteState
 
 # -------------------------------------------------------------------
 # Configuración básica
@@ -31,9 +39,24 @@ SECRET_KEY = os.getenv('SECRET_KEY')
 ALGORITHM = os.getenv('ALGORITHM')
 TOKEN_EXPIRE_TIME = timedelta(minutes=30)
 
-bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl='auth/login')
 
+# Con AUTH_STATELESS=0 el perfil sale siempre de la base de datos (o de user_cache), no del token
+STATELESS_AUTH = os.getenv('AUTH_STATELESS', '1') != '0'
+
+# Perfiles de usuario autenticados, para no consultar la base de datos en cada petición
+user_cache: TTLCache[int, AuthUser] = TTLCache(
+    maxsize=int(os.getenv('AUTH_USER_CACHE_SIZE', '1024')),
+    ttl=float(os.getenv('AUTH_USER_CACHE_TTL', '60')),
+)
+# Tokens ya verificados, hasta que caducan: ni se vuelve a comprobar la firma ni a leer el JSON
+token_cache: TTLCache[str, tuple[JwtTokenData, AuthUser | None]] = TTLCache(
+    maxsize=int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '4096')),
+    ttl=TOKEN_EXPIRE_TIME.total_seconds(),
+)
+_MODIFIED_USERS = 'modified_user_ids'
+_DELETED_USERS = 'deleted_user_ids'
+
 
 class AuthUser(BaseModel):
     user_id: int
@@ -73,6 +96,14 @@ class JwtTokenData(BaseModel):
     user_id: int
     is_admin: bool
     exp: float
+    # Perfil firmado y users.token_version al emitirlo (None en los tokens anteriores a estos campos)
+    ver: int | None = None
+    first_name: str | None = None
+    last_name: str | None = None
+    birth_date: date | None = None
+    height: float | None = None
+    weight: float | None = None
+    gender: str | None = None
 
 
 # -------------------------------------------------------------------
@@ -80,12 +111,12 @@ class JwtTokenData(BaseModel):
 # -------------------------------------------------------------------
 @router.post('/', status_code=status.HTTP_201_CREATED)
 async def create_user(db: DBSession, create_user_request: CreateUserRequest) -> None:
-    existing_user = (
-        db.query(User)
-        .filter(
+    existing_user = await db.scalar(
+        select(User)
+        .where(
             (User.username == create_user_request.username) | (User.email == create_user_request.email),
         )
-        .first()
+        .limit(1),
     )
     if existing_user:
         raise HTTPException(
@@ -95,7 +126,7 @@ async def create_user(db: DBSession, create_user_request: CreateUserRequest) ->
     create_user_model = User(
         username=create_user_request.username,
         email=create_user_request.email,
-        hashed_password=bcrypt_context.hash(create_user_request.password),
+        hashed_password=await password_hasher.hash(create_user_request.password),
         first_name=create_user_request.first_name,
         last_name=create_user_request.last_name,
         is_admin=False,
@@ -106,8 +137,7 @@ async def create_user(db: DBSession, create_user_request: CreateUserRequest) ->
     )
 
     db.add(create_user_model)
-    db.commit()
-    db.refresh(create_user_model)
+    await db.commit()
 
 
 # -------------------------------------------------------------------
@@ -118,7 +148,7 @@ async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: DBSession,
 ) -> Token:
-    user = authenticate_user(form_data.username, form_data.password, db)
+    user = await authenticate_user(form_data.username, form_data.password, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -132,6 +162,13 @@ async def login_for_access_token(
         user_id=user.id,
         is_admin=user.is_admin,
         exp=expire.timestamp(),
+        ver=user.token_version,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        birth_date=user.birth_date,
+        height=user.height,
+        weight=user.weight,
+        gender=user.gender,
     )
 
     token = create_access_token(jwt_data)
@@ -142,9 +179,9 @@ async def login_for_access_token(
 # -------------------------------------------------------------------
 # Funciones auxiliares
 # -------------------------------------------------------------------
-def authenticate_user(username: str, password: str, db: Session) -> User | None:
-    user = db.query(User).filter(User.username == username).first()
-    if not user or not bcrypt_context.verify(password, user.hashed_password):
+async def authenticate_user(username: str, password: str, db: AsyncSession) -> User | None:
+    user = await db.scalar(select(User).where(User.username == username))
+    if not user or not await password_hasher.verify(password, user.hashed_password):
         return None
 
     return user
@@ -152,40 +189,72 @@ def authenticate_user(username: str, password: str, db: Session) -> User | None:
 
 
 def create_access_token(jwt_data: JwtTokenData) -> str:
-    return jwt.encode(jwt_data.model_dump(), SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(jwt_data.model_dump(mode='json'), SECRET_KEY, algorithm=ALGORITHM)
 
 
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)], db:DBSession) -> AuthUser:
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
+    cached = token_cache.get(token)
+    if cached is None:
+        cached = decode_token(token)
+        token_cache.set(token, cached, ttl=cached[0].exp - time.time())
+    claims, user = cached
+
+    version = await token_versions.current(claims.user_id, db)
+    if version == REVOKED:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail='Could not validate credentials',
-            headers={'WWW-Authenticate': 'Bearer'},
-        ) from None
+            status_code=404,
+            detail='User not found',
+        )
+
+    # Vía rápida, sin consultas: el perfil firmado en el token, si no ha cambiado desde que se emitió
+    if user is not None and claims.ver == version:
+        return user
 
-    username = payload.get('sub')
-    user_id = payload.get('user_id')
-    is_admin = payload.get('is_admin')
-    expire_date = payload.get('exp', datetime.now(UTC).timestamp())
+    user = user_cache.get(claims.user_id)
+    if user is None:
+        user = await load_auth_user(claims.user_id, db)
+        user_cache.set(claims.user_id, user)
+
+    return user
 
-    if username is None or user_id is None:
+
+def decode_token(token: str) -> tuple[JwtTokenData, AuthUser | None]:
+    """Verifica el token; devuelve sus claims y, si lleva el perfil firmado, el usuario que describe."""
+    try:
+        claims = JwtTokenData.model_validate(jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]))
+    except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Could not validate credentials',
             headers={'WWW-Authenticate': 'Bearer'},
-        )
+        ) from None
 
-    if datetime.now(UTC) > datetime.fromtimestamp(expire_date, UTC):
+    if datetime.now(UTC) > datetime.fromtimestamp(claims.exp, UTC):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Token has expired',
             headers={'WWW-Authenticate': 'Bearer'},
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    if not STATELESS_AUTH or claims.ver is None or claims.first_name is None or claims.last_name is None:
+        return claims, None
+
+    return claims, AuthUser(
+        username=claims.sub,
+        user_id=claims.user_id,
+        is_admin=claims.is_admin,
+        first_name=claims.first_name,
+        last_name=claims.last_name,
+        birth_date=claims.birth_date,
+        height=claims.height,
+        weight=claims.weight,
+        gender=claims.gender,
+    )
+
+
+async def load_auth_user(user_id: int, db: AsyncSession) -> AuthUser:
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=404,
@@ -193,9 +262,9 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)], db:DBS
         )
 
     return AuthUser(
-        username=username,
-        user_id=user_id,
-        is_admin=is_admin,
+        username=user.username,
+        user_id=user.id,
+        is_admin=user.is_admin,
         first_name=user.first_name,
         last_name=user.last_name,
         birth_date=user.birth_date,
@@ -218,3 +287,132 @@ async def assert_admin_user(current_user: Annotated[AuthUser, Depends(get_curren
 
 AutoUser = Annotated[AuthUser, Depends(get_current_user)]
 AutoAdminUser = Annotated[AuthUser, Depends(assert_admin_user)]
+
+
+# -------------------------------------------------------------------
+# Versiones de los tokens
+# -------------------------------------------------------------------
+# Un proceso puede ver las versiones de una sesión que hizo commit después que otra con versiones
+# mayores (nextval no sigue el orden de los commits): se vuelven a pedir las últimas VERSION_OVERLAP
+VERSION_OVERLAP = 100
+REVOKED = -1
+
+
+class TokenVersions:
+    """users.token_version de los usuarios cuyo perfil ha cambiado alguna vez, en memoria.
+
+    Las versiones salen de una secuencia global, así que para ponerse al día basta con pedir las
+    mayores que la última vista: una consulta cada `refresh_interval` segundos por proceso (y justo
+    después de los cambios que hace el propio proceso), no una por petición. Un cambio hecho por otro
+    proceso se ve, como mucho, `refresh_interval` segundos después, y entonces el usuario sale de
+    user_cache. Los usuarios borrados (revoked_users) quedan como REVOKED.
+    """
+
+    def __init__(self, refresh_interval: float) -> None:
+        self.refresh_interval = refresh_interval
+
+        self._versions: dict[int, int] = {}
+        self._last_seen = 0
+        self._refreshed_at = float('-inf')
+        self._lock = asyncio.Lock()
+
+    async def current(self, user_id: int, db: AsyncSession) -> int:
+        if self._stale():
+            async with self._lock:
+                if self._stale():
+                    await self._refresh(db)
+
+        return self._versions.get(user_id, 0)
+
+    def mark_stale(self) -> None:
+        self._refreshed_at = float('-inf')
+
+    def revoke(self, user_id: int) -> None:
+        """Para usuarios borrados por este proceso, sin esperar a ver su fila de revoked_users."""
+        self._versions[user_id] = REVOKED
+
+    def _stale(self) -> bool:
+        return time.monotonic() - self._refreshed_at >= self.refresh_interval
+
+    async def _refresh(self, db: AsyncSession) -> None:
+        # Los usuarios que nunca han cambiado siguen en 0 y no se leen
+        since = max(self._last_seen - VERSION_OVERLAP, 0)
+        rows = await db.execute(union_all(
+            select(User.id, User.token_version, false().label('revoked'))
+            .where(User.token_version > since),
+            select(RevokedUser.user_id, RevokedUser.token_version, true())
+            .where(RevokedUser.token_version > since),
+        ))
+        for user_id, version, revoked in rows:
+            previous = self._versions.get(user_id)
+            if revoked:
+                self._versions[user_id] = REVOKED
+            elif previous != REVOKED:
+                self._versions[user_id] = version
+            # Cambio hecho por otro proceso: el perfil que tenga este en user_cache ya no vale
+            if self._versions[user_id] != previous:
+                invalidate_user(user_id)
+            self._last_seen = max(self._last_seen, version)
+
+        self._refreshed_at = time.monotonic()
+
+
+token_versions = TokenVersions(refresh_interval=float(os.getenv('AUTH_VERSION_REFRESH', '5')))
+
+
+# -------------------------------------------------------------------
+# Invalidación de la caché de usuarios
+# -------------------------------------------------------------------
+def invalidate_user(user_id: int | None = None) -> None:
+    """Olvida el perfil cacheado de un usuario, o el de todos si no se indica ninguno."""
+    if user_id is None:
+        user_cache.clear()
+    else:
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _forget_flushed_user(mapper: Mapper[User], connection: Connection, target: User) -> None:  # noqa: ARG001
+    invalidate_user(target.id)
+
+    # Se vuelve a invalidar tras el commit: otra petición pudo cachear la fila antigua mientras tanto
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_MODIFIED_USERS, set()).add(target.id)
+
+
+@event.listens_for(User, 'after_delete')
+def _revoke_deleted_user(mapper: Mapper[User], connection: Connection, target: User) -> None:  # noqa: ARG001
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_DELETED_USERS, set()).add(target.id)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _forget_bulk_modified_users(orm_execute_state: ORMExecuteState) -> None:
+    # update(User)/delete(User) no pasan por los eventos del mapper y no sabemos qué filas tocan
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+
+    if any(mapper.class_ is User for mapper in orm_execute_state.all_mappers):
+        invalidate_user()
+        orm_execute_state.session.info.setdefault(_MODIFIED_USERS, set()).add(None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _forget_committed_users(session: Session) -> None:
+    modified = session.info.pop(_MODIFIED_USERS, ())
+    for user_id in modified:
+        invalidate_user(user_id)
+    for user_id in session.info.pop(_DELETED_USERS, ()):
+        token_versions.revoke(user_id)
+
+    # Los triggers ya han cambiado token_version o revoked_users: este proceso lo lee en la siguiente petición
+    if modified:
+        token_versions.mark_stale()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_users(session: Session) -> None:
+    session.info.pop(_DELETED_USERS, None)
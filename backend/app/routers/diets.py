@@ -1,19 +1,32 @@
 from __future__ import annotations
 
-from datetime import UTC, datetime
+from datetime import datetime
+from itertools import chain
+from typing import TYPE_CHECKING
 
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import Response  # noqa: TC002
 from pydantic import BaseModel
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select, update
+from sqlalchemy.orm import load_only, selectinload, with_expression
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.database import DBSession  # noqa: TC001
+from app.etags import DIETS, DietsValidator, bump
 from app.models.diet import Diet
+from app.models.food_meal import FoodMeal
 from app.models.meal import Meal
 from app.models.user import User
-from app.routers.meal import FoodMealResponse
-from app.routers.meal import FoodData
-from app.routers.auth import AutoAdminUser, AutoUser  # noqa: TC001
-from app.routers.meal import MealResponse
+from app.nutrition import MACROS, NutritionTotals, diet_nutrition, meal_nutrition, move_meals
+from app.pagination import Page, Pagination, paginate
+from app.responses import model_response
+from app.routers.auth import AuthUser, AutoAdminUser, AutoUser  # noqa: TC001
+from app.routers.meal import MealResponse, meal_row
+
+
+if TYPE_CHECKING:
+    from sqlalchemy import Select
+
 
 router = APIRouter(
     prefix='/diets',
@@ -28,9 +41,24 @@ class DietResponse(BaseModel):
     client_id: int
     created_at: datetime
     meals: list[MealResponse] = []
+    totals: NutritionTotals = NutritionTotals()
     model_config = {"from_attributes": True}
 
 
+class MealNutrition(BaseModel):
+    id: int
+    name: str
+    totals: NutritionTotals
+
+
+class DietNutrition(BaseModel):
+    id: int
+    name: str
+    client_id: int
+    totals: NutritionTotals
+    meals: list[MealNutrition] = []
+
+
 class DietCreate(BaseModel):
     name: str
     client_id: int
@@ -46,93 +74,195 @@ async def create_diet(
         current_user: AutoAdminUser,
 ) -> DietResponse:
     # Verificar que el cliente exista
-    client = db.query(User).filter(User.id == diet_request.client_id).first()
+    client = await db.scalar(select(User).where(User.id == diet_request.client_id))
     if not client:
         raise HTTPException(status_code=404, detail='Cliente no encontrado.')
 
+    # Validar todas las comidas con una sola consulta (y cargar su árbol para la respuesta)
+    meal_ids = set(diet_request.meal_ids)
+    meals = []
+    if meal_ids:
+        meals = (await db.scalars(
+            select(Meal)
+            .where(Meal.id.in_(meal_ids))
+            .options(
+                selectinload(Meal.food_meals).selectinload(FoodMeal.food),
+                with_expression(Meal.nutrition, meal_nutrition()),
+            )
+            .order_by(Meal.id),
+        )).all()
+
+    missing = sorted(meal_ids - {meal.id for meal in meals})
+    if missing:
+        raise HTTPException(status_code=404, detail=f'Comidas no encontradas: {", ".join(map(str, missing))}')
+
+    # Las comidas que ya estaban en otra dieta salen de ella: sus dueños también ven un cambio
+    previous_diet_ids = {meal.diet_id for meal in meals if meal.diet_id is not None}
+    previous_owners = []
+    if previous_diet_ids:
+        previous_owners = (await db.execute(
+            select(Diet.trainer_id, Diet.client_id).where(Diet.id.in_(previous_diet_ids)).distinct(),
+        )).all()
+
     new_diet = Diet(
         name=diet_request.name,
         trainer_id=current_user.user_id,
         client_id=diet_request.client_id,
-        created_at=datetime.now(UTC),
     )
-
     db.add(new_diet)
-    db.commit()
-    db.refresh(new_diet)
+    await db.flush()
 
-    # Asociar comidas existentes por ID
-    for meal_id in diet_request.meal_ids:
-        meal = db.query(Meal).filter(Meal.id == meal_id).first()
-        if not meal:
-            raise HTTPException(status_code=404, detail=f'Comida {meal_id} no encontrada.')
-        meal.diet_id = new_diet.id
-        db.add(meal)
-    db.commit()
+    # Asociar comidas existentes con un único UPDATE
+    if meal_ids:
+        await db.execute(update(Meal).where(Meal.id.in_(meal_ids)).values(diet_id=new_diet.id))
+        await move_meals(db, meal_ids, new_diet.id)
+    await bump(db, DIETS, [new_diet.trainer_id, new_diet.client_id, *chain.from_iterable(previous_owners)])
+    await db.commit()
 
-    return new_diet
+    set_committed_value(new_diet, 'meals', meals)
+    return diet_to_response(new_diet)
 
 
 # ---------------------- Ver todas las dietas ----------------------
-@router.get('/')
+@router.get('/', response_model=Page[DietResponse])
 async def get_all_diets(
         db: DBSession,
         current_user: AutoUser,
-) -> list[DietResponse]:
-    filter_element = Diet.trainer_id if current_user.is_admin else Diet.client_id
-    diets = (db.query(Diet)).all()
-    response = []
-    for diet in diets:
-        meals_response = []
-
-        for meal in diet.meals:
-            foods_in_meal = [
-                FoodMealResponse(
-                    id=fm.id,
-                    servings=fm.servings,
-                    food=FoodData.model_validate(fm.food)
-                )
-                for fm in meal.food_meals
-            ]
-
-            meals_response.append(MealResponse(
-                id=meal.id,
-                name=meal.name,
-                foods=foods_in_meal
-            ))
-
-        response.append(DietResponse(
-            id=diet.id,
-            name=diet.name,
-            trainer_id=diet.trainer_id,
-            client_id=diet.client_id,
-            created_at=diet.created_at,
-            meals=meals_response
-        ))
-
-    return response
-
-
-
-#ToDo: Get diet by id
+        page: Pagination,
+        validator: DietsValidator,
+) -> Response:
+    if validator.not_modified:
+        return validator.not_modified_response()
+
+    return validator.apply(await paginate(db, diet_tree_query(current_user), Diet.id, page, diet_to_response))
+
+
+# ---------------------- Resumen nutricional ----------------------
+@router.get('/nutrition', response_model=Page[DietNutrition])
+async def get_diets_nutrition(
+        db: DBSession,
+        current_user: AutoUser,
+        page: Pagination,
+        validator: DietsValidator,
+) -> Response:
+    """Totales de macros por dieta y por comida, sin descargar el árbol de alimentos."""
+    if validator.not_modified:
+        return validator.not_modified_response()
+
+    return validator.apply(await paginate(db, diet_nutrition_query(current_user), Diet.id, page, diet_to_nutrition))
+
+
+@router.get('/{diet_id}/nutrition', response_model=DietNutrition)
+async def get_diet_nutrition(
+        diet_id: int,
+        db: DBSession,
+        current_user: AutoUser,
+        validator: DietsValidator,
+) -> Response:
+    if validator.not_modified:
+        return validator.not_modified_response()
+
+    diet = await db.scalar(diet_nutrition_query(current_user).where(Diet.id == diet_id))
+    if not diet:
+        raise HTTPException(status_code=404, detail='Dieta no encontrada.')
+
+    return validator.apply(model_response(diet_to_nutrition(diet)))
+
 
 # ---------------------- Ver una dieta específica ----------------------
-#
-# @router.get('/{diet_id}')
-# async def get_diet(
-#         diet_id: int,
-#         db: DBSession,
-#         current_user: AutoUser,
-# ) -> DietResponse:
-#     diet = db.query(Diet).options(joinedload(Diet.meals).joinedload(Meal.foods)).filter(Diet.id == diet_id).first()
-#     if not diet:
-#         raise HTTPException(status_code=404, detail='Dieta no encontrada.')
-#
-#     # Solo el entrenador o el cliente asignado pueden verla
-#     if not (
-#             (current_user.is_admin and diet.trainer_id == current_user.user_id)
-#             or (not current_user.is_admin and diet.client_id == current_user.user_id)
-#     ):
-#         raise HTTPException(status_code=403, detail='No tienes permiso para ver esta dieta.')
-#
-#     return diet
+@router.get('/{diet_id}', response_model=DietResponse)
+async def get_diet(
+        diet_id: int,
+        db: DBSession,
+        current_user: AutoUser,
+        validator: DietsValidator,
+) -> Response:
+    if validator.not_modified:
+        return validator.not_modified_response()
+
+    # Solo el entrenador o el cliente asignado pueden verla
+    diet = await db.scalar(diet_tree_query(current_user).where(Diet.id == diet_id))
+    if not diet:
+        raise HTTPException(status_code=404, detail='Dieta no encontrada.')
+
+    return validator.apply(model_response(diet_to_response(diet)))
+
+
+# ---------------------- Funciones auxiliares ----------------------
+def diet_tree_query(current_user: AuthUser) -> Select[tuple[Diet]]:
+    """Dietas visibles para el usuario con todo el árbol dieta → comidas → alimentos precargado.
+
+    El árbol se carga siempre con cuatro consultas (dietas, comidas, food_meal y alimentos), sin importar
+    su tamaño. Los alimentos van en una consulta aparte por clave primaria: se comparten entre comidas y
+    un JOIN con foods acaba en un Seq Scan cuando la tabla crece.
+    """
+    owner_column = Diet.trainer_id if current_user.is_admin else Diet.client_id
+
+    return (
+        select(Diet)
+        .where(owner_column == current_user.user_id)
+        .options(
+            with_expression(Diet.nutrition, diet_nutrition()),
+            selectinload(Diet.meals).options(
+                with_expression(Meal.nutrition, meal_nutrition()),
+                selectinload(Meal.food_meals).selectinload(FoodMeal.food),
+            ),
+        )
+        .order_by(Diet.id)
+    )
+
+
+def diet_nutrition_query(current_user: AuthUser) -> Select[tuple[Diet]]:
+    """Como diet_tree_query, pero solo con los totales: las sumas se hacen en PostgreSQL."""
+    owner_column = Diet.trainer_id if current_user.is_admin else Diet.client_id
+
+    return (
+        select(Diet)
+        .where(owner_column == current_user.user_id)
+        .options(
+            with_expression(Diet.nutrition, diet_nutrition()),
+            selectinload(Diet.meals).options(
+                load_only(Meal.id, Meal.name),
+                with_expression(Meal.nutrition, meal_nutrition()),
+            ),
+        )
+        .order_by(Diet.id)
+    )
+
+
+def diet_to_response(diet: Diet) -> DietResponse:
+    # Todo el árbol como diccionarios y una sola validación (ver meal_row)
+    meals = [meal_row(meal) for meal in diet.meals]
+
+    return DietResponse.model_validate({
+        'id': diet.id,
+        'name': diet.name,
+        'trainer_id': diet.trainer_id,
+        'client_id': diet.client_id,
+        'created_at': diet.created_at,
+        'meals': meals,
+        'totals': diet_totals(diet, meals),
+    })
+
+
+def diet_to_nutrition(diet: Diet) -> DietNutrition:
+    meals = [
+        {'id': meal.id, 'name': meal.name, 'totals': NutritionTotals.row(meal.nutrition)}
+        for meal in diet.meals
+    ]
+
+    return DietNutrition.model_validate({
+        'id': diet.id,
+        'name': diet.name,
+        'client_id': diet.client_id,
+        'totals': diet_totals(diet, meals),
+        'meals': meals,
+    })
+
+
+def diet_totals(diet: Diet, meals: list[dict]) -> dict[str, float]:
+    # Una dieta recién creada no se ha leído con with_expression: se suman sus comidas
+    if diet.nutrition is None:
+        return {macro: sum(meal['totals'][macro] for meal in meals) for macro in MACROS}
+
+    return NutritionTotals.row(diet.nutrition)
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, status, HTTPException
+from fastapi.responses import Response  # noqa: TC002
 from pydantic import BaseModel
+from sqlalchemy import select
 from app.database import DBSession, Database
+from app.etags import EVERYONE, EXERCISES, ExercisesValidator, bump
 from app.models.exercise import Exercise
+from app.pagination import Page, Pagination, paginate
 from app.routers.auth import AutoAdminUser  # noqa: TC001
 
 
@@ -41,8 +45,8 @@ async def create_exercise(
         comment=exercise.comment,
     )
     db.add(new_exercise)
-    db.commit()
-    db.refresh(new_exercise)
+    await bump(db, EXERCISES, [EVERYONE])
+    await db.commit()
     return ExerciseResponse(
         id=new_exercise.id,
         name=new_exercise.name,
@@ -53,11 +57,18 @@ async def create_exercise(
 
 
 # ---------------------- Ver ejercios ----------------------
-@router.get('/', status_code=status.HTTP_200_OK, response_model=list[ExerciseResponse])
+@router.get('/', status_code=status.HTTP_200_OK, response_model=Page[ExerciseResponse])
 async def get_all_exercises(
         db: DBSession,
         current_user: AutoAdminUser,  # noqa: ARG001
-) -> list[ExerciseResponse]:
-    exercises = db.query(Exercise).all()
+        page: Pagination,
+        validator: ExercisesValidator,
+) -> Response:
+    if validator.not_modified:
+        return validator.not_modified_response()
 
-    return exercises
\ No newline at end of file
+    return validator.apply(await paginate(db, select(Exercise), Exercise.id, page, exercise_to_response))
+
+
+def exercise_to_response(exercise: Exercise) -> ExerciseResponse:
+    return ExerciseResponse.model_validate(exercise, from_attributes=True)
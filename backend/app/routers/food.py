@@ -1,64 +1,71 @@
-from fastapi import APIRouter, HTTPException
+from collections.abc import Sequence
+from typing import Annotated, Any, Literal, NamedTuple
+
+from fastapi import APIRouter, Body, Depends, HTTPException, status
 from pydantic import BaseModel, Field
-from fatsecret import Fatsecret
-from os import environ
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import DBSession
+from app.etags import DIETS, bump
+from app.food_search import FoodData, FoodSearchService, get_food_search_service
+from app.models.diet import Diet
 from app.models.food import Food
 from app.models.food_meal import FoodMeal
 from app.models.meal import Meal
+from app.nutrition import MACROS, add_foods
 from app.routers.auth import AutoAdminUser
 
 router = APIRouter(prefix="/foods", tags=["diets"])
 
-consumer_key = environ['CONSUMER_KEY']
-consumer_secret = environ['CONSUMER_SECRET']
-fs = Fatsecret(consumer_key, consumer_secret)
-
 
 class FoodSearchRequest(BaseModel):
     query: str
 
 
-class FoodData(BaseModel):
+class FoodDataForAdd(FoodData):
+    servings: int
+
+
+# created: alimento nuevo; existing: ya existía (se usan las macros guardadas, no las de la petición)
+FoodStatus = Literal['created', 'existing']
+
+
+class FoodAddResult(BaseModel):
+    index: int
+    food_id: int
+    food_meal_id: int
+    food: FoodStatus
+
+
+class FoodBatchResult(BaseModel):
+    meal_id: int
+    items: list[FoodAddResult]
+
+
+class StoredFood(NamedTuple):
     id: int
-    name: str
-    serving: str
-    calories: float
-    fats: float
-    carbs: float
-    protein: float
-    url: str
-
-    model_config = {"from_attributes": True}
-
-    @classmethod
-    def from_description(cls, data: dict, food_description: str):
-        serving, contents = food_description.split(" - ", maxsplit=1)
-        contents = contents.split(" | ", maxsplit=3)
-        return cls(
-            id=int(data['food_id']),
-            name=data['food_name'],
-            url=data['food_url'],
-            serving=serving,
-            calories=float(contents[0][10:-4]),
-            fats=float(contents[1][5:-1]),
-            carbs=float(contents[2][7:-1]),
-            protein=float(contents[3][9:-1])
-        )
+    status: FoodStatus
+    # Macros con las que ha quedado el alimento en foods (las que cuentan para los totales)
+    macros: dict[str, float]
 
 
-class FoodDataForAdd(FoodData):
-    servings: int
+MAX_BATCH_SIZE = 500
+FOOD_COLUMNS = ('name', 'serving', 'url', *MACROS)
 
 
 # ---------------------- SEARCH ----------------------
 @router.post("/search", response_model=list[FoodData])
-async def search_foods(req: FoodSearchRequest):
-    results = fs.foods_search(req.query)
+async def search_foods(
+        req: FoodSearchRequest,
+        db: DBSession,
+        food_search: Annotated[FoodSearchService, Depends(get_food_search_service)],
+):
+    results = await food_search.search(req.query, db)
     if not results:
         raise HTTPException(404, "No se encontraron alimentos.")
 
-    return [FoodData.from_description(f, f['food_description']) for f in results]
+    return results
 
 
 # ---------------------- ADD FOOD TO MEAL ----------------------
@@ -69,32 +76,157 @@ async def add_food_to_meal(
         db: DBSession,
         current_user: AutoAdminUser
 ):
-    meal = db.query(Meal).filter(Meal.id == meal_id).first()
+    meal = await get_meal(db, meal_id)
+    [result] = await add_to_meal(db, meal, [food_data])
+    await db.commit()
+
+    return {"message": "Food added", "food_id": result.food_id}
+
+
+# ---------------------- ADD FOODS TO MEAL (LOTE) ----------------------
+@router.post("/meal/{meal_id}/batch", status_code=status.HTTP_201_CREATED)
+async def add_foods_to_meal(
+        meal_id: int,
+        foods: Annotated[list[FoodDataForAdd], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+        db: DBSession,
+        current_user: AutoAdminUser
+) -> FoodBatchResult:
+    """Añade varios alimentos a una comida en una sola transacción.
+
+    Los alimentos se resuelven con una consulta (por id de FatSecret o por nombre), los que faltan se crean
+    con un INSERT por lotes y todas las filas de food_meal se insertan a la vez.
+    """
+    meal = await get_meal(db, meal_id)
+    items = await add_to_meal(db, meal, foods)
+    await db.commit()
+
+    return FoodBatchResult(meal_id=meal_id, items=items)
+
+
+# ---------------------- Funciones auxiliares ----------------------
+async def get_meal(db: AsyncSession, meal_id: int) -> Meal:
+    meal = await db.scalar(select(Meal).where(Meal.id == meal_id))
     if not meal:
         raise HTTPException(status_code=404, detail='Comida no encontrada.')
 
-    food = db.query(Food).filter(Food.name == food_data.name).first()
-    if not food:
-        food = Food(
-            name=food_data.name,
-            serving=food_data.serving,
-            calories=food_data.calories,
-            carbs=food_data.carbs,
-            fats=food_data.fats,
-            protein=food_data.protein,
-            url=food_data.url
+    return meal
+
+
+async def add_to_meal(db: AsyncSession, meal: Meal, foods: Sequence[FoodDataForAdd]) -> list[FoodAddResult]:
+    """Guarda los alimentos y los enlaza con la comida, sin hacer commit."""
+    stored = await upsert_foods(db, foods)
+
+    food_meal_ids = (await db.scalars(
+        insert(FoodMeal).returning(FoodMeal.id, sort_by_parameter_order=True),
+        [
+            {'meal_id': meal.id, 'food_id': food.id, 'servings': food_data.servings}
+            for food, food_data in zip(stored, foods, strict=True)
+        ],
+    )).all()
+    await add_foods(db, meal, [
+        (food.macros, food_data.servings) for food, food_data in zip(stored, foods, strict=True)
+    ])
+
+    if meal.diet_id is not None:
+        owners = (await db.execute(select(Diet.trainer_id, Diet.client_id).where(Diet.id == meal.diet_id))).one()
+        await bump(db, DIETS, owners)
+
+    return [
+        FoodAddResult(index=index, food_id=food.id, food_meal_id=food_meal_id, food=food.status)
+        for index, (food, food_meal_id) in enumerate(zip(stored, food_meal_ids, strict=True))
+    ]
+
+
+async def upsert_foods(db: AsyncSession, foods: Sequence[FoodData]) -> list[StoredFood]:
+    """Guarda los alimentos que faltan y devuelve su id en foods y si se han creado o ya existían.
+
+    Los alimentos de FatSecret se identifican por su id de FatSecret (external_id, o id en los clientes
+    que no mandan external_id) con un único INSERT ... ON CONFLICT, así que dos peticiones simultáneas
+    con el mismo alimento no lo duplican. Un alimento que ya existía no se modifica: sus macros solo se
+    actualizan con lo que devuelve FatSecret (ver FoodSearchService). Los que no tienen id de FatSecret
+    se reutilizan por nombre. Si el mismo alimento aparece varias veces, se guarda una sola vez (con los
+    datos de la última).
+    """
+    keys = [fatsecret_id(food) for food in foods]
+    by_external_id = await upsert_external_foods(db, {
+        key: food_values(food) for key, food in zip(keys, foods, strict=True) if key is not None
+    })
+    by_name = await insert_missing_foods(db, {
+        food.name: food_values(food) for key, food in zip(keys, foods, strict=True) if key is None
+    })
+
+    return [
+        by_name[food.name] if key is None else by_external_id[key]
+        for key, food in zip(keys, foods, strict=True)
+    ]
+
+
+async def upsert_external_foods(db: AsyncSession, foods: dict[int, dict[str, Any]]) -> dict[int, StoredFood]:
+    if not foods:
+        return {}
+
+    # `previous` ve la instantánea de antes de la sentencia: los alimentos que ya existían
+    previous = select(Food.external_id).where(Food.external_id.in_(foods.keys())).cte('previous')
+    # El DO UPDATE no cambia nada: solo sirve para que RETURNING devuelva también las filas que ya existían
+    statement = insert(Food).values([{'external_id': external_id, **values} for external_id, values in foods.items()])
+    upserted = (
+        statement.on_conflict_do_update(
+            index_elements=[Food.external_id],
+            set_={'external_id': statement.excluded.external_id},
         )
-        db.add(food)
-        db.commit()
-        db.refresh(food)
-
-    # Crear relación con Meal
-    food_meal = FoodMeal(
-        meal_id=meal_id,
-        food_id=food.id,
-        servings=food_data.servings
+        .returning(Food.id, Food.external_id, *(getattr(Food, macro) for macro in MACROS))
+        .cte('upserted')
+    )
+    rows = await db.execute(
+        select(upserted, previous.c.external_id.is_not(None).label('existed'))
+        .outerjoin(previous, previous.c.external_id == upserted.c.external_id),
     )
-    db.add(food_meal)
-    db.commit()
 
-    return {"message": "Food added", "food_id": food.id}
+    return {
+        row.external_id: StoredFood(
+            row.id,
+            'existing' if row.existed else 'created',
+            {macro: getattr(row, macro) or 0.0 for macro in MACROS},
+        )
+        for row in rows
+    }
+
+
+async def insert_missing_foods(db: AsyncSession, foods: dict[str, dict[str, Any]]) -> dict[str, StoredFood]:
+    if not foods:
+        return {}
+
+    # Sin id de FatSecret solo se puede reutilizar por nombre (índice ix_foods_name); si hay varios con
+    # el mismo nombre, el más antiguo
+    existing = (
+        select(Food.id, Food.name, *(getattr(Food, macro) for macro in MACROS))
+        .where(Food.name.in_(foods.keys()))
+        .distinct(Food.name)
+        .order_by(Food.name, Food.id)
+    )
+    stored: dict[str, StoredFood] = {
+        row.name: StoredFood(row.id, 'existing', {macro: getattr(row, macro) or 0.0 for macro in MACROS})
+        for row in await db.execute(existing)
+    }
+
+    missing = [name for name in foods if name not in stored]
+    if missing:
+        food_ids = (await db.scalars(
+            insert(Food).returning(Food.id, sort_by_parameter_order=True),
+            [foods[name] for name in missing],
+        )).all()
+        stored.update(
+            (name, StoredFood(food_id, 'created', {macro: foods[name][macro] for macro in MACROS}))
+            for name, food_id in zip(missing, food_ids, strict=True)
+        )
+
+    return stored
+
+
+def fatsecret_id(food: FoodData) -> int | None:
+    # En los resultados de búsqueda id es el id de FatSecret (None en los alimentos propios)
+    return food.external_id if food.external_id is not None else food.id
+
+
+def food_values(food: FoodData) -> dict[str, Any]:
+    return {column: getattr(food, column) for column in FOOD_COLUMNS}
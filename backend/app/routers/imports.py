@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import csv
+import io
+from typing import TYPE_CHECKING, Any
+
+from fastapi import APIRouter, HTTPException, UploadFile, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+
+from app.database import DBSession  # noqa: TC001
+from app.etags import DIETS, ROUTINES, bump
+from app.models.diet import Diet
+from app.models.exercise import Exercise
+from app.models.food import Food
+from app.models.food_meal import FoodMeal
+from app.models.meal import Meal
+from app.models.routine import Routine
+from app.models.routine_exercise import RoutineExercise
+from app.models.user import User
+from app.nutrition import refresh_meals
+from app.routers.auth import AutoAdminUser  # noqa: TC001
+from app.routers.routines import RoutineExerciseCreate
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+router = APIRouter(
+    prefix='/import',
+    tags=['import'],
+)
+
+
+# ---------------------- Esquemas Pydantic ----------------------
+class ImportRoutine(BaseModel):
+    ref: str | None = None
+    name: str
+    description: str | None = None
+    client_id: int
+    exercises: list[RoutineExerciseCreate] = []
+
+
+class ImportFood(BaseModel):
+    name: str
+    serving: str
+    calories: float = 0
+    carbs: float = 0
+    fats: float = 0
+    protein: float = 0
+    url: str = ''
+    servings: int
+
+
+class ImportMeal(BaseModel):
+    name: str
+    description: str | None = None
+    foods: list[ImportFood] = []
+
+
+class ImportDiet(BaseModel):
+    ref: str | None = None
+    name: str
+    client_id: int
+    meals: list[ImportMeal] = []
+
+
+class PlanImport(BaseModel):
+    routines: list[ImportRoutine] = []
+    diets: list[ImportDiet] = []
+
+
+class ImportIssue(BaseModel):
+    ref: str
+    detail: str
+
+
+class ImportReport(BaseModel):
+    routines: int = 0
+    diets: int = 0
+    meals: int = 0
+    foods: int = 0
+    errors: list[ImportIssue] = []
+
+
+# ---------------------- Importar plan (JSON) ----------------------
+@router.post('/', status_code=status.HTTP_201_CREATED)
+async def import_plan_json(
+        plan: PlanImport,
+        db: DBSession,
+        current_user: AutoAdminUser,
+) -> ImportReport:
+    return await import_plan(db, current_user.user_id, plan)
+
+
+# ---------------------- Importar plan (CSV) ----------------------
+@router.post('/csv', status_code=status.HTTP_201_CREATED)
+async def import_plan_csv(
+        file: UploadFile,
+        db: DBSession,
+        current_user: AutoAdminUser,
+) -> ImportReport:
+    try:
+        content = (await file.read()).decode('utf-8-sig')
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail='El fichero CSV debe estar en UTF-8.') from e
+
+    plan, errors = parse_plan_csv(content)
+    report = await import_plan(db, current_user.user_id, plan)
+    report.errors = errors + report.errors
+    return report
+
+
+# ---------------------- Importación por lotes ----------------------
+async def import_plan(db: AsyncSession, trainer_id: int, plan: PlanImport) -> ImportReport:
+    """Valida todas las referencias con una consulta por tabla y escribe el plan en una sola transacción.
+
+    Los elementos con referencias inválidas se descartan y se devuelven en `errors`; el resto se
+    inserta con INSERT por lotes (executemany), sin una ida y vuelta por fila.
+    """
+    report = ImportReport()
+
+    client_ids = {item.client_id for item in [*plan.routines, *plan.diets]}
+    exercise_ids = {ex.exercise_id for routine in plan.routines for ex in routine.exercises}
+    known_clients = await existing_ids(db, User.id, client_ids)
+    known_exercises = await existing_ids(db, Exercise.id, exercise_ids)
+
+    routines = []
+    for index, routine in enumerate(plan.routines):
+        missing = sorted({ex.exercise_id for ex in routine.exercises} - known_exercises)
+        if routine.client_id not in known_clients:
+            report.errors.append(ImportIssue(ref=routine.ref or f'routines[{index}]', detail='Cliente no encontrado.'))
+        elif missing:
+            report.errors.append(ImportIssue(
+                ref=routine.ref or f'routines[{index}]',
+                detail=f'Ejercicios no encontrados: {", ".join(map(str, missing))}',
+            ))
+        else:
+            routines.append(routine)
+
+    diets = []
+    for index, diet in enumerate(plan.diets):
+        if diet.client_id not in known_clients:
+            report.errors.append(ImportIssue(ref=diet.ref or f'diets[{index}]', detail='Cliente no encontrado.'))
+        else:
+            diets.append(diet)
+
+    await insert_routines(db, trainer_id, routines)
+    report.routines = len(routines)
+
+    report.foods = await insert_diets(db, trainer_id, diets)
+    report.diets = len(diets)
+    report.meals = sum(len(diet.meals) for diet in diets)
+
+    if routines:
+        await bump(db, ROUTINES, [trainer_id, *(routine.client_id for routine in routines)])
+    if diets:
+        await bump(db, DIETS, [trainer_id, *(diet.client_id for diet in diets)])
+    await db.commit()
+    return report
+
+
+async def existing_ids(db: AsyncSession, id_column: Any, ids: set[int]) -> set[int]:
+    if not ids:
+        return set()
+
+    return set((await db.scalars(select(id_column).where(id_column.in_(ids)))).all())
+
+
+async def insert_returning_ids(db: AsyncSession, model: Any, rows: list[dict[str, Any]]) -> list[int]:
+    if not rows:
+        return []
+
+    # executemany con RETURNING: los ids vuelven en el mismo orden que las filas
+    result = await db.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+    return list(result.scalars())
+
+
+async def insert_routines(db: AsyncSession, trainer_id: int, routines: list[ImportRoutine]) -> None:
+    routine_ids = await insert_returning_ids(db, Routine, [
+        {'name': r.name, 'description': r.description, 'trainer_id': trainer_id, 'client_id': r.client_id}
+        for r in routines
+    ])
+
+    exercise_rows = [
+        {
+            'routine_id': routine_id,
+            'exercise_id': ex.exercise_id,
+            'min_repeats': ex.reps_min,
+            'max_repeats': ex.reps_max,
+            'set': ex.sets,
+        }
+        for routine_id, routine in zip(routine_ids, routines, strict=True)
+        for ex in routine.exercises
+    ]
+    if exercise_rows:
+        await db.execute(insert(RoutineExercise), exercise_rows)
+
+
+async def insert_diets(db: AsyncSession, trainer_id: int, diets: list[ImportDiet]) -> int:
+    """Inserta dietas, comidas y alimentos. Devuelve cuántos alimentos nuevos se han creado."""
+    diet_ids = await insert_returning_ids(db, Diet, [
+        {'name': d.name, 'trainer_id': trainer_id, 'client_id': d.client_id}
+        for d in diets
+    ])
+
+    meals = [(diet_id, meal) for diet_id, diet in zip(diet_ids, diets, strict=True) for meal in diet.meals]
+    meal_ids = await insert_returning_ids(db, Meal, [
+        {'diet_id': diet_id, 'name': meal.name, 'description': meal.description}
+        for diet_id, meal in meals
+    ])
+
+    # Alimentos: se reutilizan por nombre, igual que en POST /foods/meal/{meal_id}
+    foods = {food.name: food for _, meal in meals for food in meal.foods}
+    food_ids: dict[str, int] = {}
+    if foods:
+        food_ids = dict((await db.execute(
+            select(Food.name, Food.id).where(Food.name.in_(foods.keys())),
+        )).tuples().all())
+
+    new_foods = [food for name, food in foods.items() if name not in food_ids]
+    new_food_ids = await insert_returning_ids(db, Food, [
+        food.model_dump(exclude={'servings'}) for food in new_foods
+    ])
+    food_ids.update(zip((food.name for food in new_foods), new_food_ids, strict=True))
+
+    food_meal_rows = [
+        {'meal_id': meal_id, 'food_id': food_ids[food.name], 'servings': food.servings}
+        for meal_id, (_, meal) in zip(meal_ids, meals, strict=True)
+        for food in meal.foods
+    ]
+    if food_meal_rows:
+        await db.execute(insert(FoodMeal), food_meal_rows)
+
+    # Totales de las comidas nuevas en meal_nutrition, calculados con un único INSERT ... SELECT
+    if meal_ids:
+        await refresh_meals(db, meal_ids)
+
+    return len(new_foods)
+
+
+# ---------------------- CSV ----------------------
+CSV_COLUMNS = (
+    'kind', 'plan', 'client_id', 'description',
+    'exercise_id', 'reps_min', 'reps_max', 'sets',
+    'meal', 'food', 'serving', 'calories', 'carbs', 'fats', 'protein', 'url', 'servings',
+)
+
+
+def parse_plan_csv(content: str) -> tuple[PlanImport, list[ImportIssue]]:
+    """Convierte un CSV (una fila por ejercicio o por alimento) en un PlanImport.
+
+    La columna `kind` indica si la fila es de una rutina (`routine`) o de una dieta (`diet`); las filas
+    con el mismo `kind`, `plan` y `client_id` se agrupan en el mismo elemento. Una fila sin ejercicio o
+    sin alimento crea la rutina o la comida vacía.
+    """
+    routines: dict[tuple[str, str], ImportRoutine] = {}
+    diets: dict[tuple[str, str], ImportDiet] = {}
+    meals: dict[tuple[str, str, str], ImportMeal] = {}
+    errors = []
+
+    reader = csv.DictReader(io.StringIO(content))
+    for row in reader:
+        line = f'line {reader.line_num}'
+        values = {key: value.strip() for key, value in row.items() if key in CSV_COLUMNS and value and value.strip()}
+        kind = values.get('kind', '').lower()
+        key = (values.get('plan', ''), values.get('client_id', ''))
+
+        try:
+            if kind == 'routine':
+                routine = routines.get(key)
+                if routine is None:
+                    routine = routines[key] = ImportRoutine(
+                        ref=line, name=key[0], client_id=key[1], description=values.get('description'),
+                    )
+                if 'exercise_id' in values:
+                    routine.exercises.append(RoutineExerciseCreate.model_validate(values))
+
+            elif kind == 'diet':
+                diet = diets.get(key)
+                if diet is None:
+                    diet = diets[key] = ImportDiet(ref=line, name=key[0], client_id=key[1])
+                meal = meals.get((*key, values.get('meal', '')))
+                if meal is None and 'meal' in values:
+                    meal = meals[(*key, values['meal'])] = ImportMeal(name=values['meal'])
+                    diet.meals.append(meal)
+                if 'food' in values:
+                    if meal is None:
+                        errors.append(ImportIssue(ref=line, detail='Falta la columna meal.'))
+                        continue
+                    meal.foods.append(ImportFood.model_validate({**values, 'name': values['food']}))
+
+            else:
+                errors.append(ImportIssue(ref=line, detail=f'Tipo de fila desconocido: {kind!r}'))
+
+        except ValidationError as e:
+            detail = '; '.join(f'{".".join(map(str, err["loc"]))}: {err["msg"]}' for err in e.errors())
+            errors.append(ImportIssue(ref=line, detail=detail))
+
+    return PlanImport(routines=list(routines.values()), diets=list(diets.values())), errors
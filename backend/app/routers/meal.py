@@ -1,17 +1,28 @@
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import Response
 from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload, with_expression
 from app.database import DBSession
+from app.models.food import Food
 from app.models.food_meal import FoodMeal
 from app.models.meal import Meal
+from app.nutrition import NutritionTotals, init_meal, meal_nutrition
+from app.pagination import Page, Pagination, paginate
 from app.routers.auth import AutoAdminUser
 from app.routers.food import FoodData
 
 router = APIRouter(prefix="/meals", tags=["diets"])
 
 
+class MealFoodData(FoodData):
+    # En las comidas, id es la clave de foods; el id de FatSecret (si lo tiene) va en external_id
+    id: int
+
+
 class FoodMealResponse(BaseModel):
     id: int
-    food: FoodData
+    food: MealFoodData
     servings: int
     model_config = {"from_attributes": True}
 
@@ -20,6 +31,7 @@ class MealResponse(BaseModel):
     id: int
     name: str
     foods: list[FoodMealResponse] = []
+    totals: NutritionTotals = NutritionTotals()
     model_config = {"from_attributes": True}
 
 
@@ -39,8 +51,9 @@ async def create_meal(
         description=meal.description
     )
     db.add(new_meal)
-    db.commit()
-    db.refresh(new_meal)
+    await db.flush()
+    await init_meal(db, new_meal)
+    await db.commit()
 
     return MealResponse(
         id=new_meal.id,
@@ -49,25 +62,47 @@ async def create_meal(
     )
 
 # ---------------------- Ver todas las meals ----------------------
-@router.get("/", response_model=list[MealResponse])
-async def get_all_meals(db: DBSession, current_user: AutoAdminUser):
-    meals = db.query(Meal).all()
-    response = []
-
-    for meal in meals:
-        foods_in_meal = [
-            FoodMealResponse(
-                id=fm.id,
-                food=FoodData.model_validate(fm.food),
-                servings=fm.servings
-            )
+@router.get("/", response_model=Page[MealResponse])
+async def get_all_meals(db: DBSession, current_user: AutoAdminUser, page: Pagination) -> Response:
+    meals = select(Meal).options(
+        selectinload(Meal.food_meals).selectinload(FoodMeal.food),
+        with_expression(Meal.nutrition, meal_nutrition()),
+    )
+
+    return await paginate(db, meals, Meal.id, page, meal_to_response)
+
+
+def meal_to_response(meal: Meal) -> MealResponse:
+    return MealResponse.model_validate(meal_row(meal))
+
+
+def meal_row(meal: Meal) -> dict:
+    """La comida como diccionarios anidados.
+
+    Se valida de una vez (el árbol entero en pydantic-core) en lugar de construir un modelo por
+    alimento, que es donde se iba el tiempo en las respuestas grandes.
+    """
+    return {
+        'id': meal.id,
+        'name': meal.name,
+        'foods': [
+            {'id': fm.id, 'servings': fm.servings, 'food': food_row(fm.food)}
             for fm in meal.food_meals
-        ]
+        ],
+        'totals': NutritionTotals.row(meal.nutrition),
+    }
 
-        response.append(MealResponse(
-            id=meal.id,
-            name=meal.name,
-            foods=foods_in_meal
-        ))
 
-    return response
+def food_row(food: Food) -> dict:
+    return {
+        'id': food.id,
+        'name': food.name,
+        'serving': food.serving,
+        'calories': food.calories,
+        'fats': food.fats,
+        'carbs': food.carbs,
+        'protein': food.protein,
+        'url': food.url,
+        'external_id': food.external_id,
+        'food_id': food.id,
+    }
@@ -0,0 +1,258 @@
+"""Progreso de los ejercicios: series (peso x repeticiones) con fecha, y su evolución agregada.
+
+Las series de una sesión de entrenamiento se guardan con una sola petición (un INSERT por lotes).
+La evolución se agrega en PostgreSQL por intervalos (hora, día, semana o mes; en rangos muy largos,
+varios meses por intervalo): por cada intervalo, el peso máximo, el volumen (peso x repeticiones) y el
+1RM estimado (fórmula de Epley), así que el cliente recibe como mucho `max_points` puntos aunque el
+rango tenga miles de series.
+"""
+from __future__ import annotations
+
+import math
+from datetime import UTC, datetime, timedelta
+from enum import StrEnum
+from typing import TYPE_CHECKING, Annotated
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import APIRouter, HTTPException, Query, status
+from pydantic import BaseModel, Field
+from sqlalchemy import Integer, case, exists, extract, func, insert, literal, or_, select
+
+from app.database import DBSession  # noqa: TC001
+from app.models.diet import Diet
+from app.models.exercise import Exercise
+from app.models.exercise_progress import ExerciseProgress
+from app.models.routine import Routine
+from app.routers.auth import AutoUser  # noqa: TC001
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.routers.auth import AuthUser
+
+
+router = APIRouter(
+    prefix='/progress',
+    tags=['routines'],
+)
+
+MAX_SETS = 500
+DEFAULT_RANGE = timedelta(days=90)
+# Los intervalos semanales empiezan en lunes (el 3 de enero de 2000 lo fue)
+WEEK_ORIGIN = datetime(2000, 1, 3)  # noqa: DTZ001
+
+
+class Bucket(StrEnum):
+    AUTO = 'auto'
+    HOUR = 'hour'
+    DAY = 'day'
+    WEEK = 'week'
+    MONTH = 'month'
+
+
+# Duración (aproximada en el caso del mes) de cada intervalo, de menor a mayor: para elegir el de 'auto'
+BUCKET_LENGTHS = {
+    Bucket.HOUR: timedelta(hours=1),
+    Bucket.DAY: timedelta(days=1),
+    Bucket.WEEK: timedelta(weeks=1),
+    Bucket.MONTH: timedelta(days=30),
+}
+
+
+# ----------------------  Esquemas Pydantic ----------------------
+class ProgressSet(BaseModel):
+    exercise_id: int
+    weight: float | None = Field(default=None, ge=0)
+    repetitions: int | None = Field(default=None, ge=0)
+    # Si no se indica, la de la sesión (ProgressBatch.recorded_at)
+    recorded_at: datetime | None = None
+
+
+class ProgressBatch(BaseModel):
+    # Cliente al que pertenecen las series (por defecto, el usuario actual)
+    user_id: int | None = None
+    recorded_at: datetime | None = None
+    sets: list[ProgressSet] = Field(min_length=1, max_length=MAX_SETS)
+
+
+class ProgressBatchResult(BaseModel):
+    user_id: int
+    inserted: int
+
+
+class ProgressPoint(BaseModel):
+    start: datetime
+    sets: int
+    repetitions: int
+    max_weight: float | None
+    volume: float
+    estimated_1rm: float | None
+
+
+class ProgressSeries(BaseModel):
+    user_id: int
+    exercise_id: int
+    bucket: Bucket
+    # Intervalos de `bucket` por punto: más de 1 solo con meses, si el rango tiene más de max_points meses
+    bucket_size: int = 1
+    start: datetime
+    end: datetime
+    points: list[ProgressPoint]
+
+
+# ----------------------  Registrar series ----------------------
+@router.post('/', status_code=status.HTTP_201_CREATED)
+async def record_progress(
+    batch: ProgressBatch,
+    db: DBSession,
+    current_user: AutoUser,
+) -> ProgressBatchResult:
+    user_id = await progress_owner(db, current_user, batch.user_id)
+
+    exercise_ids = {progress_set.exercise_id for progress_set in batch.sets}
+    found = set(await db.scalars(select(Exercise.id).where(Exercise.id.in_(exercise_ids))))
+    missing = sorted(exercise_ids - found)
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f'Ejercicios no encontrados: {", ".join(map(str, missing))}',
+        )
+
+    session_time = batch.recorded_at or datetime.now(UTC)
+    # Un único INSERT para toda la sesión (insertmanyvalues)
+    await db.execute(insert(ExerciseProgress), [
+        {
+            'user_id': user_id,
+            'exercise_id': progress_set.exercise_id,
+            'weight': progress_set.weight,
+            'repetitions': progress_set.repetitions,
+            'recorded_at': progress_set.recorded_at or session_time,
+        }
+        for progress_set in batch.sets
+    ])
+    await db.commit()
+
+    return ProgressBatchResult(user_id=user_id, inserted=len(batch.sets))
+
+
+# ----------------------  Evolución de un ejercicio ----------------------
+@router.get('/{exercise_id}')
+async def get_progress(
+    exercise_id: int,
+    db: DBSession,
+    current_user: AutoUser,
+    user_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    bucket: Bucket = Bucket.AUTO,
+    max_points: Annotated[int, Query(ge=1, le=1000)] = 200,
+    tz: str = 'UTC',
+) -> ProgressSeries:
+    """Series de `exercise_id` entre `start` y `end` (por defecto, los últimos 90 días), agregadas por intervalo.
+
+    Se usa el intervalo pedido, o uno mayor si con él saldrían más de `max_points` puntos (con
+    bucket=auto, el más pequeño que no pase de ahí; si ni por meses caben, varios meses por punto).
+    Los días, semanas y meses se cuentan en la zona horaria `tz`.
+    """
+    user_id = await progress_owner(db, current_user, user_id)
+
+    end = aware(end) if end else datetime.now(UTC)
+    start = aware(start) if start else end - DEFAULT_RANGE
+    if start >= end:
+        raise HTTPException(status_code=422, detail='start debe ser anterior a end.')
+
+    try:
+        zone = ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=422, detail=f'Zona horaria desconocida: {tz}') from None
+
+    bucket = coarsest(bucket, auto_bucket(end - start, max_points))
+    bucket_size = 1
+
+    # Hora local sin zona: los límites de día, semana y mes caen donde los ve el usuario
+    local_time = func.timezone(tz, ExerciseProgress.recorded_at)
+    if bucket == Bucket.MONTH:
+        # Grupos de bucket_size meses contados desde el mes de `start`
+        first = month_index(start.astimezone(zone))
+        bucket_size = math.ceil((month_index((end - timedelta.resolution).astimezone(zone)) - first + 1) / max_points)
+        months = extract('year', local_time) * 12 + extract('month', local_time) - 1 - first
+        first_month = datetime(first // 12, first % 12 + 1, 1)  # noqa: DTZ001
+        local_start = literal(first_month) + func.make_interval(
+            0, func.floor(months / bucket_size).cast(Integer) * bucket_size,
+        )
+    else:
+        local_start = func.date_bin(BUCKET_LENGTHS[bucket], local_time, literal(WEEK_ORIGIN))
+    bucket_start = func.timezone(tz, local_start).label('start')
+
+    epley = case(
+        (ExerciseProgress.repetitions <= 1, ExerciseProgress.weight),
+        else_=ExerciseProgress.weight * (1 + ExerciseProgress.repetitions / 30.0),
+    )
+    rows = await db.execute(
+        select(
+            bucket_start,
+            func.count().label('sets'),
+            func.coalesce(func.sum(ExerciseProgress.repetitions), 0).label('repetitions'),
+            func.max(ExerciseProgress.weight).label('max_weight'),
+            func.coalesce(func.sum(ExerciseProgress.weight * ExerciseProgress.repetitions), 0.0).label('volume'),
+            func.max(epley).label('estimated_1rm'),
+        )
+        .where(
+            ExerciseProgress.user_id == user_id,
+            ExerciseProgress.exercise_id == exercise_id,
+            ExerciseProgress.recorded_at >= start,
+            ExerciseProgress.recorded_at < end,
+        )
+        .group_by(bucket_start)
+        .order_by(bucket_start),
+    )
+
+    return ProgressSeries.model_validate({
+        'user_id': user_id,
+        'exercise_id': exercise_id,
+        'bucket': bucket,
+        'bucket_size': bucket_size,
+        'start': start,
+        'end': end,
+        'points': [row._asdict() for row in rows],
+    })
+
+
+# ---------------------- Funciones auxiliares ----------------------
+async def progress_owner(db: AsyncSession, current_user: AuthUser, user_id: int | None) -> int:
+    """Usuario cuyo progreso se lee o escribe: el propio, o un cliente del entrenador (con rutina o dieta suya)."""
+    if user_id is None or user_id == current_user.user_id:
+        return current_user.user_id
+
+    if current_user.is_admin:
+        is_client = await db.scalar(select(or_(
+            exists().where(Routine.trainer_id == current_user.user_id, Routine.client_id == user_id),
+            exists().where(Diet.trainer_id == current_user.user_id, Diet.client_id == user_id),
+        )))
+        if is_client:
+            return user_id
+
+    raise HTTPException(status_code=403, detail='No tienes acceso al progreso de este usuario.')
+
+
+def auto_bucket(span: timedelta, max_points: int) -> Bucket:
+    # Un rango que no empieza en el límite de un intervalo toca uno más de los que caben en él
+    for bucket, length in BUCKET_LENGTHS.items():
+        if span / length <= max_points - 1:
+            return bucket
+
+    return Bucket.MONTH
+
+
+def coarsest(*buckets: Bucket) -> Bucket:
+    return max((bucket for bucket in buckets if bucket != Bucket.AUTO), key=list(BUCKET_LENGTHS).index)
+
+
+def month_index(moment: datetime) -> int:
+    return moment.year * 12 + moment.month - 1
+
+
+def aware(moment: datetime) -> datetime:
+    # Las fechas sin zona horaria se interpretan en UTC
+    return moment if moment.tzinfo else moment.replace(tzinfo=UTC)
@@ -1,17 +1,28 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import TYPE_CHECKING
 
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import Response  # noqa: TC002
 from pydantic import BaseModel
+from sqlalchemy import insert, select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.database import DBSession
+from app.etags import ROUTINES, RoutinesValidator, bump
 from app.models.exercise import Exercise
 from app.models.routine import Routine
 from app.models.routine_exercise import RoutineExercise
 from app.models.user import User
-from app.routers.auth import AutoAdminUser, AutoUser
-from app.routers.exercises import ExerciseResponse
+from app.pagination import Page, Pagination, paginate
+from app.routers.auth import AuthUser, AutoAdminUser, AutoUser
+from app.routers.exercises import ExerciseResponse, exercise_to_response
+
+
+if TYPE_CHECKING:
+    from sqlalchemy import Select
 
 
 router = APIRouter(
@@ -67,10 +78,23 @@ async def create_routine(
     current_user: AutoAdminUser,
 ) -> RoutineResponse:
 
-    client = db.query(User).filter(User.id == routine_request.client_id).first()
+    client = await db.scalar(select(User).where(User.id == routine_request.client_id))
     if not client:
         raise HTTPException(status_code=404, detail='Cliente no encontrado.')
 
+    # Validar todos los ejercicios con una sola consulta
+    exercise_ids = {ex.exercise_id for ex in routine_request.exercises}
+    exercises = {}
+    if exercise_ids:
+        exercises = {e.id: e for e in await db.scalars(select(Exercise).where(Exercise.id.in_(exercise_ids)))}
+
+    missing = sorted(exercise_ids - exercises.keys())
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f'Ejercicios no encontrados: {", ".join(map(str, missing))}'
+        )
+
     new_routine = Routine(
         name=routine_request.name,
         description=routine_request.description,
@@ -78,42 +102,77 @@ async def create_routine(
         client_id=routine_request.client_id,
     )
     db.add(new_routine)
-    db.commit()
-    db.refresh(new_routine)
-
-    for ex in routine_request.exercises:
-
-        exercise = db.query(Exercise).filter(Exercise.id == ex.exercise_id).first()
-        if not exercise:
-            raise HTTPException(
-                status_code=404,
-                detail=f'Ejercicio {ex.exercise_id} no encontrado'
-            )
-
-        routine_ex = RoutineExercise(
-            routine_id=new_routine.id,
-            exercise_id=ex.exercise_id,
-            reps_min=ex.reps_min,
-            reps_max=ex.reps_max,
-            sets=ex.sets,
-        )
-
-        db.add(routine_ex)
-
-    db.commit()
-    db.refresh(new_routine)
-
-    return new_routine
+    await db.flush()
+
+    routine_exercises = []
+    if routine_request.exercises:
+        # Un único INSERT para todas las filas (insertmanyvalues)
+        routine_exercises = (await db.scalars(
+            insert(RoutineExercise).returning(RoutineExercise, sort_by_parameter_order=True),
+            [
+                {
+                    'routine_id': new_routine.id,
+                    'exercise_id': ex.exercise_id,
+                    'min_repeats': ex.reps_min,
+                    'max_repeats': ex.reps_max,
+                    'set': ex.sets,
+                }
+                for ex in routine_request.exercises
+            ],
+        )).all()
+
+    await bump(db, ROUTINES, [new_routine.trainer_id, new_routine.client_id])
+    await db.commit()
+
+    # Completar las relaciones con lo que ya tenemos en memoria, sin volver a consultar
+    for routine_ex in routine_exercises:
+        set_committed_value(routine_ex, 'exercise', exercises[routine_ex.exercise_id])
+    set_committed_value(new_routine, 'routine_exercises', routine_exercises)
+
+    return routine_to_response(new_routine)
 
 
 # ---------------------- Ver rutinas ----------------------
-@router.get('/')
+@router.get('/', response_model=Page[RoutineResponse])
 async def get_all_routines(
     db: DBSession,
     current_user: AutoUser,
-) -> list[RoutineResponse]:
+    page: Pagination,
+    validator: RoutinesValidator,
+) -> Response:
+    if validator.not_modified:
+        return validator.not_modified_response()
+
+    return validator.apply(await paginate(db, routine_tree_query(current_user), Routine.id, page, routine_to_response))
+
+
+# ---------------------- Funciones auxiliares ----------------------
+def routine_tree_query(current_user: AuthUser) -> Select[tuple[Routine]]:
     filter_element = Routine.trainer_id if current_user.is_admin else Routine.client_id
 
-    routines = db.query(Routine).filter(filter_element == current_user.user_id).all()
+    return (
+        select(Routine)
+        .where(filter_element == current_user.user_id)
+        .options(selectinload(Routine.routine_exercises).joinedload(RoutineExercise.exercise))
+    )
+
 
-    return routines
+def routine_to_response(routine: Routine) -> RoutineResponse:
+    return RoutineResponse(
+        id=routine.id,
+        name=routine.name,
+        description=routine.description,
+        created_at=routine.created_at,
+        trainer_id=routine.trainer_id,
+        client_id=routine.client_id,
+        exercises=[
+            RoutineExerciseResponse(
+                id=routine_ex.id,
+                exercise=exercise_to_response(routine_ex.exercise),
+                reps_min=routine_ex.min_repeats,
+                reps_max=routine_ex.max_repeats,
+                sets=routine_ex.set,
+            )
+            for routine_ex in routine.routine_exercises
+        ],
+    )
@@ -0,0 +1,101 @@
+"""Concurrencia de la capa de base de datos: Session síncrona vs AsyncSession.
+
+Simula N peticiones simultáneas a un handler `async def` que ejecuta una consulta lenta
+(`pg_sleep`). Con la Session síncrona cada consulta bloquea el event loop y las peticiones
+se serializan; con AsyncSession se solapan hasta el tamaño del pool.
+
+    python -m benchmarks.async_db --requests 50 --delay 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import TYPE_CHECKING
+
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import ASYNC_DRIVER, database_url
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+
+SLOW_QUERY = text('SELECT pg_sleep(:delay)')
+
+
+def default_url() -> str:
+    return database_url('localhost')
+
+
+async def run_sync_session(db_url: str, requests: int, delay: float) -> list[float]:
+    engine = create_engine(db_url, pool_size=requests)
+    session_maker = sessionmaker(bind=engine)
+
+    async def handler(arrived: float) -> float:
+        with session_maker() as db:
+            db.execute(SLOW_QUERY, {'delay': delay})
+        return time.perf_counter() - arrived
+
+    try:
+        return await measure(handler, requests)
+    finally:
+        engine.dispose()
+
+
+async def run_async_session(db_url: str, requests: int, delay: float) -> list[float]:
+    engine = create_async_engine(make_url(db_url).set(drivername=ASYNC_DRIVER), pool_size=requests)
+    session_maker = async_sessionmaker(engine)
+
+    async def handler(arrived: float) -> float:
+        async with session_maker() as db:
+            await db.execute(SLOW_QUERY, {'delay': delay})
+        return time.perf_counter() - arrived
+
+    try:
+        return await measure(handler, requests)
+    finally:
+        await engine.dispose()
+
+
+async def measure(handler: Callable[[float], Awaitable[float]], requests: int) -> list[float]:
+    # Calentar el pool para no medir el coste de abrir conexiones
+    await asyncio.gather(*(handler(time.perf_counter()) for _ in range(requests)))
+
+    # Todas las peticiones llegan a la vez: la latencia incluye el tiempo esperando al event loop
+    arrived = time.perf_counter()
+    return await asyncio.gather(*(handler(arrived) for _ in range(requests)))
+
+
+def report(name: str, latencies: list[float], elapsed: float) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f'{name:<14} wall {elapsed * 1000:8.1f} ms | '
+        f'p50 {statistics.median(latencies) * 1000:8.1f} ms | '
+        f'p95 {p95 * 1000:8.1f} ms | '
+        f'{len(latencies) / elapsed:8.1f} req/s',
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        '--url', default=None, help='postgresql:// URL (por defecto, a partir de DB_USER/DB_PASS/DB_NAME)',
+    )
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--delay', type=float, default=0.05, help='segundos que tarda cada consulta')
+    args = parser.parse_args()
+
+    db_url = args.url or default_url()
+    for name, runner in (('sync Session', run_sync_session), ('AsyncSession', run_async_session)):
+        latencies = await runner(db_url, args.requests, args.delay)
+        report(name, latencies, max(latencies))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,184 @@
+"""Benchmark de extremo a extremo: escenarios HTTP contra la aplicación, en el mismo proceso.
+
+Genera datos nuevos con benchmarks.seed (acepta sus mismas opciones) y lanza cada escenario con
+`--concurrency` usuarios simultáneos durante `--duration` segundos, a través de httpx.ASGITransport
+(sin red ni uvicorn: se mide la aplicación). FatSecret se sustituye por un cliente local con
+`--upstream-latency` segundos de retardo.
+
+Para cada escenario: peticiones por segundo, latencia p50/p95/p99, errores y sentencias SQL por
+petición (de app.metrics). Escribe datos en la base de datos indicada: usar una de pruebas.
+
+    python -m benchmarks.e2e --duration 10 --concurrency 16
+    python -m benchmarks.e2e --scenarios 'GET /diets/,GET /routines/'
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from itertools import count
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from app.__main__ import create_app
+from app.database import Database
+from app.food_search import FoodSearchService, FoodSearchSettings, get_food_search_service
+from app.metrics import registry
+from benchmarks.async_db import default_url
+from benchmarks.seed import FOOD_STYLES, FOOD_WORDS, PASSWORD, Seeded, SeedConfig, add_arguments, config_from_args, seed
+from benchmarks.workers import load
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+# Usuarios con sesión iniciada que reparten la carga de los escenarios autenticados
+LOGGED_IN_USERS = 20
+# Búsquedas sin alimentos parecidos en la base de datos: van a FatSecret (y después a su caché)
+REMOTE_QUERIES = ('quinoa', 'tofu', 'seitán', 'kéfir', 'hummus', 'tempeh', 'edamame', 'chía')
+
+
+class StubFatsecret:
+    """Sustituto del cliente de FatSecret: resultados sintéticos tras un retardo fijo."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.calls = 0
+
+    def foods_search(self, search_expression: str) -> list[dict[str, Any]]:
+        self.calls += 1
+        time.sleep(self.latency)  # se llama desde un hilo, igual que el cliente real
+        return [
+            {
+                'food_id': str(abs(hash((search_expression, i))) % 10**9),
+                'food_name': f'{search_expression} fatsecret {i}',
+                'food_url': f'https://example.com/fatsecret/{i}',
+                'food_description': f'Per 100g - Calories: {100 + i}kcal | Fat: 1.00g | Carbs: 10.00g | Protein: 5.00g',
+            }
+            for i in range(10)
+        ]
+
+
+async def login(client: httpx.AsyncClient, username: str) -> dict[str, str]:
+    response = await client.post('/auth/login', data={'username': username, 'password': PASSWORD})
+    response.raise_for_status()
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+
+async def build_scenarios(
+        client: httpx.AsyncClient,
+        seeded: Seeded,
+        rng: random.Random,
+) -> dict[str, Callable[[], httpx.Request]]:
+    clients = seeded.clients[:LOGGED_IN_USERS]
+    client_headers = [await login(client, username) for username in clients]
+    trainers = list(seeded.clients_by_trainer.items())[:LOGGED_IN_USERS]
+    trainer_headers = [(await login(client, username), client_ids) for username, client_ids in trainers]
+
+    # Las ETag de cada cliente, para el escenario de revalidación (304)
+    diet_etags = [(await client.get('/diets/', headers=headers)).headers['ETag'] for headers in client_headers]
+
+    queries = [f'{word} {style}' for word in FOOD_WORDS for style in FOOD_STYLES] + list(REMOTE_QUERIES) * 4
+    routine_names = count()
+
+    def new_routine() -> httpx.Request:
+        headers, client_ids = rng.choice(trainer_headers)
+        return client.build_request('POST', '/routines/', headers=headers, json={
+            'name': f'Rutina e2e {next(routine_names)}',
+            'client_id': rng.choice(client_ids),
+            'exercises': [
+                {'exercise_id': exercise_id, 'reps_min': 8, 'reps_max': 12, 'sets': 3}
+                for exercise_id in rng.sample(seeded.exercise_ids, min(5, len(seeded.exercise_ids)))
+            ],
+        })
+
+    def revalidate_diets() -> httpx.Request:
+        index = rng.randrange(len(client_headers))
+        headers = {**client_headers[index], 'If-None-Match': diet_etags[index]}
+        return client.build_request('GET', '/diets/', headers=headers)
+
+    return {
+        'POST /auth/login': lambda: client.build_request(
+            'POST', '/auth/login', data={'username': rng.choice(clients), 'password': PASSWORD},
+        ),
+        'GET /auth/me': lambda: client.build_request('GET', '/auth/me', headers=rng.choice(client_headers)),
+        'GET /diets/': lambda: client.build_request('GET', '/diets/', headers=rng.choice(client_headers)),
+        'GET /diets/ (304)': revalidate_diets,
+        'GET /routines/': lambda: client.build_request('GET', '/routines/', headers=rng.choice(client_headers)),
+        'POST /foods/search': lambda: client.build_request(
+            'POST', '/foods/search', headers=rng.choice(client_headers), json={'query': rng.choice(queries)},
+        ),
+        'POST /routines/': new_routine,
+    }
+
+
+def percentile(latencies: list[float], percent: int) -> float:
+    if len(latencies) <= 1:
+        return latencies[0]
+
+    return statistics.quantiles(latencies, n=100, method='inclusive')[percent - 1]
+
+
+def statements_per_request() -> dict[str, float]:
+    """Sentencias SQL por petición acumuladas en app.metrics, por 'MÉTODO ruta'."""
+    return {
+        f'{method} {route}': metrics.statements / sum(metrics.responses.values())
+        for (method, route), metrics in registry.routes.items()
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        '--url', default=None, help='postgresql:// URL (por defecto, a partir de DB_USER/DB_PASS/DB_NAME)',
+    )
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--scenarios', default=None, help='escenarios separados por comas (por defecto, todos)')
+    parser.add_argument('--upstream-latency', type=float, default=0.2, help='retardo del FatSecret simulado (s)')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    db_url = args.url or default_url()
+    Database.migrate(db_url)
+    Database.init(db_url)
+
+    config: SeedConfig = config_from_args(args)
+    start = time.perf_counter()
+    seeded = await seed(config, f'e2e-{time.time_ns()}')
+    print(f'datos: {sum(seeded.rows.values())} filas en {time.perf_counter() - start:.1f} s ({seeded.rows})')
+
+    app = create_app()
+    upstream = StubFatsecret(args.upstream_latency)
+    food_search = FoodSearchService(upstream, FoodSearchSettings())
+    app.dependency_overrides[get_food_search_service] = lambda: food_search
+
+    rng = random.Random(config.random_seed)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', limits=limits, timeout=60) as client:
+        scenarios = await build_scenarios(client, seeded, rng)
+        selected = args.scenarios.split(',') if args.scenarios else list(scenarios)
+
+        print(f'{"escenario":<20} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"SQL/req":>8} {"errores":>8}')
+        for name in selected:
+            await load(client, scenarios[name], args.concurrency, 1)  # calentamiento
+            registry.clear()
+            errors, latencies = await load(client, scenarios[name], args.concurrency, args.duration)
+            statements = statements_per_request().get(name.split(' (')[0], 0.0)
+            print(
+                f'{name:<20} {len(latencies) / args.duration:8.1f} '
+                f'{percentile(latencies, 50) * 1000:8.1f} {percentile(latencies, 95) * 1000:8.1f} '
+                f'{percentile(latencies, 99) * 1000:8.1f} {statements:8.1f} {errors:8}',
+            )
+
+    print(f'llamadas a FatSecret: {upstream.calls}')
+    await Database.engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
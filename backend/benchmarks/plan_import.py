@@ -0,0 +1,198 @@
+"""Importación masiva de planes: endpoints uno a uno vs POST /import.
+
+Genera un plan con `--rows` filas (ejercicios de rutina + alimentos de comida, a partes iguales) y lo
+escribe de dos formas: llamando a los handlers de siempre (`POST /routines/`, `POST /meals/`,
+`POST /foods/meal/{id}`, `POST /diets/`) una vez por elemento, cada uno con su sesión y sus commits,
+y con `import_plan`, que lo escribe por lotes en una sola transacción.
+
+Escribe datos en la base de datos indicada: usar una base de datos de pruebas.
+
+    python -m benchmarks.plan_import --rows 10000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import TYPE_CHECKING
+
+from sqlalchemy import insert, select
+
+from app.database import Database
+from app.models.exercise import Exercise
+from app.models.user import User
+from app.routers.auth import AuthUser
+from app.routers.diets import DietCreate, create_diet
+from app.routers.food import FoodDataForAdd, add_food_to_meal
+from app.routers.imports import ImportDiet, ImportFood, ImportMeal, ImportRoutine, PlanImport, import_plan
+from app.routers.meal import MealCreate, create_meal
+from app.routers.routines import RoutineCreate, RoutineExerciseCreate, create_routine
+from benchmarks.async_db import default_url
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+
+EXERCISES_PER_ROUTINE = 5
+MEALS_PER_DIET = 4
+FOODS_PER_MEAL = 5
+CLIENTS = 20
+EXERCISES = 50
+FOODS = 200
+
+
+async def seed(run: str) -> tuple[AuthUser, list[int], list[int]]:
+    """Crea el entrenador, los clientes y los ejercicios a los que hace referencia el plan."""
+    async with Database.new_session() as db:
+        user_ids = (await db.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), [
+            {
+                'username': f'bench-{run}-{i}',
+                'email': f'bench-{run}-{i}@example.com',
+                'hashed_password': '-',
+                'first_name': 'Bench',
+                'last_name': str(i),
+                'is_admin': i == 0,
+            }
+            for i in range(CLIENTS + 1)
+        ])).all()
+        exercise_ids = (await db.scalars(insert(Exercise).returning(Exercise.id, sort_by_parameter_order=True), [
+            {'name': f'bench-{run}-exercise-{i}'} for i in range(EXERCISES)
+        ])).all()
+        await db.commit()
+
+        trainer = await db.scalar(select(User).where(User.id == user_ids[0]))
+
+    current_user = AuthUser(
+        user_id=trainer.id,
+        username=trainer.username,
+        first_name=trainer.first_name,
+        last_name=trainer.last_name,
+        is_admin=True,
+    )
+    return current_user, list(user_ids[1:]), list(exercise_ids)
+
+
+def build_plan(run: str, rows: int, client_ids: list[int], exercise_ids: list[int]) -> PlanImport:
+    routines = [
+        ImportRoutine(
+            name=f'Rutina {i}',
+            client_id=client_ids[i % len(client_ids)],
+            exercises=[
+                RoutineExerciseCreate(
+                    exercise_id=exercise_ids[(i + j) % len(exercise_ids)], reps_min=8, reps_max=12, sets=3,
+                )
+                for j in range(EXERCISES_PER_ROUTINE)
+            ],
+        )
+        for i in range(rows // 2 // EXERCISES_PER_ROUTINE)
+    ]
+    diets = [
+        ImportDiet(
+            name=f'Dieta {i}',
+            client_id=client_ids[i % len(client_ids)],
+            meals=[
+                ImportMeal(
+                    name=f'Comida {j}',
+                    foods=[
+                        ImportFood(
+                            name=f'bench-{run}-food-{(i + j + k) % FOODS}',
+                            serving='100 g',
+                            calories=100,
+                            carbs=10,
+                            fats=5,
+                            protein=8,
+                            servings=1 + k,
+                        )
+                        for k in range(FOODS_PER_MEAL)
+                    ],
+                )
+                for j in range(MEALS_PER_DIET)
+            ],
+        )
+        for i in range(rows // 2 // (MEALS_PER_DIET * FOODS_PER_MEAL))
+    ]
+    return PlanImport(routines=routines, diets=diets)
+
+
+async def import_one_by_one(plan: PlanImport, current_user: AuthUser, concurrency: int) -> None:
+    """Lo que hace hoy el frontend: una petición (sesión + commit) por rutina, comida, alimento y dieta."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(handler: Callable[..., Awaitable[object]], *args: object) -> object:
+        async with semaphore, Database.new_session() as db:
+            return await handler(*args, db, current_user)
+
+    async def one_routine(routine: ImportRoutine) -> None:
+        request = RoutineCreate(name=routine.name, client_id=routine.client_id, exercises=routine.exercises)
+        await call(create_routine, request)
+
+    async def one_diet(diet: ImportDiet) -> None:
+        meal_ids = []
+        for meal in diet.meals:
+            created = await call(create_meal, MealCreate(name=meal.name))
+            for food in meal.foods:
+                await call(add_food_to_meal, created.id, FoodDataForAdd(**food.model_dump()))
+            meal_ids.append(created.id)
+        await call(create_diet, DietCreate(name=diet.name, client_id=diet.client_id, meal_ids=meal_ids))
+
+    await asyncio.gather(
+        *(one_routine(routine) for routine in plan.routines),
+        *(one_diet(diet) for diet in plan.diets),
+    )
+
+
+async def import_bulk(plan: PlanImport, current_user: AuthUser) -> None:
+    async with Database.new_session() as db:
+        report = await import_plan(db, current_user.user_id, plan)
+
+    if report.errors:
+        msg = f'import_plan reported errors: {report.errors[:5]}'
+        raise RuntimeError(msg)
+
+
+def count_rows(plan: PlanImport) -> int:
+    return (
+        sum(len(routine.exercises) for routine in plan.routines)
+        + sum(len(meal.foods) for diet in plan.diets for meal in diet.meals)
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        '--url', default=None, help='postgresql:// URL (por defecto, a partir de DB_USER/DB_PASS/DB_NAME)',
+    )
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--concurrency', type=int, default=10, help='peticiones simultáneas en el modo uno a uno')
+    parser.add_argument('--skip-one-by-one', action='store_true', help='medir solo POST /import')
+    args = parser.parse_args()
+
+    db_url = args.url or default_url()
+    Database.migrate(db_url)
+    Database.init(db_url)
+
+    runners: list[tuple[str, Callable[[PlanImport, AuthUser], Awaitable[None]]]] = [
+        ('POST /import', import_bulk),
+    ]
+    if not args.skip_one_by_one:
+        runners.insert(0, ('uno a uno', lambda plan, user: import_one_by_one(plan, user, args.concurrency)))
+
+    for name, runner in runners:
+        # Cada ejecución con sus propios alimentos, para que las dos tengan que crearlos
+        run = f'{name.split()[0].strip("/").lower()}-{time.time_ns()}'
+        current_user, client_ids, exercise_ids = await seed(run)
+        plan = build_plan(run, args.rows, client_ids, exercise_ids)
+
+        start = time.perf_counter()
+        await runner(plan, current_user)
+        elapsed = time.perf_counter() - start
+
+        rows = count_rows(plan)
+        print(f'{name:<14} {rows} filas en {elapsed * 1000:9.1f} ms | {rows / elapsed:9.1f} filas/s')
+
+    await Database.engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
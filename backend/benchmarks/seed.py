@@ -0,0 +1,239 @@
+"""Generador de datos sintéticos para los benchmarks.
+
+Crea entrenadores, clientes, ejercicios, alimentos, rutinas, dietas (con comidas y alimentos) y filas
+de progreso, en las cantidades indicadas, con INSERT por lotes en una sola transacción. Los datos son
+reproducibles: dependen solo de `--random-seed`. Todos los usuarios tienen la contraseña PASSWORD.
+
+Escribe datos en la base de datos indicada: usar una base de datos de pruebas.
+
+    python -m benchmarks.seed --trainers 5 --clients-per-trainer 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field, fields
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.database import Database
+from app.models.diet import Diet
+from app.models.exercise import Exercise
+from app.models.exercise_progress import ExerciseProgress
+from app.models.food import Food
+from app.models.food_meal import FoodMeal
+from app.models.meal import Meal
+from app.models.routine import Routine
+from app.models.routine_exercise import RoutineExercise
+from app.models.user import User
+from app.nutrition import refresh_meals
+from app.passwords import bcrypt_context
+from app.routers.imports import insert_returning_ids
+from benchmarks.async_db import default_url
+from tools.progress_partitions import maintain
+
+
+PASSWORD = 'bench-password'  # noqa: S105
+
+# Nombres de alimentos: palabras reales para que la búsqueda por similitud tenga algo que encontrar
+FOOD_WORDS = (
+    'pollo', 'arroz', 'avena', 'huevo', 'leche', 'yogur', 'atún', 'salmón', 'pasta', 'pan', 'queso',
+    'plátano', 'manzana', 'naranja', 'lentejas', 'garbanzos', 'patata', 'brócoli', 'tomate', 'aceite',
+)
+FOOD_STYLES = ('cocido', 'a la plancha', 'integral', 'desnatado', 'natural', 'al horno', 'crudo', 'light')
+
+
+@dataclass(frozen=True)
+class SeedConfig:
+    trainers: int = 5
+    clients_per_trainer: int = 20
+    exercises: int = 200
+    foods: int = 2000
+    routines_per_client: int = 3
+    exercises_per_routine: int = 6
+    diets_per_client: int = 2
+    meals_per_diet: int = 5
+    foods_per_meal: int = 4
+    progress_per_client: int = 200
+    progress_days: int = 365
+    random_seed: int = 1
+
+
+@dataclass
+class Seeded:
+    """Lo que necesitan los escenarios para hacer peticiones con los datos generados."""
+    trainers: list[str] = field(default_factory=list)
+    clients: list[str] = field(default_factory=list)
+    # Clientes de cada entrenador, por id (para crear rutinas que pasen la validación)
+    clients_by_trainer: dict[str, list[int]] = field(default_factory=dict)
+    exercise_ids: list[int] = field(default_factory=list)
+    food_names: list[str] = field(default_factory=list)
+    rows: dict[str, int] = field(default_factory=dict)
+
+
+async def seed(config: SeedConfig, run: str) -> Seeded:
+    rng = random.Random(config.random_seed)
+    seeded = Seeded()
+    # Un solo hash: bcrypt por usuario haría que sembrar tardase más que el propio benchmark
+    hashed_password = bcrypt_context.hash(PASSWORD)
+
+    async with Database.new_session() as db:
+        trainer_names = [f'{run}-trainer-{t}' for t in range(config.trainers)]
+        client_names = [
+            f'{run}-client-{t}-{c}' for t in range(config.trainers) for c in range(config.clients_per_trainer)
+        ]
+        user_ids = await insert_returning_ids(db, User, [
+            {
+                'username': name,
+                'email': f'{name}@example.com',
+                'hashed_password': hashed_password,
+                'first_name': 'Bench',
+                'last_name': name,
+                'is_admin': name in trainer_names,
+            }
+            for name in [*trainer_names, *client_names]
+        ])
+        trainer_ids = user_ids[:config.trainers]
+        client_ids = user_ids[config.trainers:]
+        owners = [
+            (trainer_ids[t], client_ids[t * config.clients_per_trainer + c])
+            for t in range(config.trainers) for c in range(config.clients_per_trainer)
+        ]
+
+        exercise_ids = await insert_returning_ids(db, Exercise, [
+            {'name': f'{run}-exercise-{i}', 'description': 'Ejercicio generado'} for i in range(config.exercises)
+        ])
+
+        food_names = [
+            f'{rng.choice(FOOD_WORDS)} {rng.choice(FOOD_STYLES)} {run}-{i}' for i in range(config.foods)
+        ]
+        food_ids = await insert_returning_ids(db, Food, [
+            {
+                'name': name,
+                'serving': '100 g',
+                'calories': round(rng.uniform(20, 600), 1),
+                'carbs': round(rng.uniform(0, 80), 1),
+                'fats': round(rng.uniform(0, 40), 1),
+                'protein': round(rng.uniform(0, 40), 1),
+                'url': f'https://example.com/foods/{run}-{i}',
+            }
+            for i, name in enumerate(food_names)
+        ])
+
+        routine_ids = await insert_returning_ids(db, Routine, [
+            {'name': f'Rutina {r}', 'trainer_id': trainer_id, 'client_id': client_id}
+            for trainer_id, client_id in owners for r in range(config.routines_per_client)
+        ])
+        routine_exercises = [
+            {
+                'routine_id': routine_id,
+                'exercise_id': exercise_id,
+                'min_repeats': 8,
+                'max_repeats': 12,
+                'set': rng.randint(2, 5),
+            }
+            for routine_id in routine_ids
+            for exercise_id in rng.sample(exercise_ids, min(config.exercises_per_routine, len(exercise_ids)))
+        ]
+        if routine_exercises:
+            await db.execute(insert(RoutineExercise), routine_exercises)
+
+        diet_ids = await insert_returning_ids(db, Diet, [
+            {'name': f'Dieta {d}', 'trainer_id': trainer_id, 'client_id': client_id}
+            for trainer_id, client_id in owners for d in range(config.diets_per_client)
+        ])
+        meal_ids = await insert_returning_ids(db, Meal, [
+            {'name': f'Comida {m}', 'diet_id': diet_id} for diet_id in diet_ids for m in range(config.meals_per_diet)
+        ])
+        food_meals = [
+            {'meal_id': meal_id, 'food_id': food_id, 'servings': rng.randint(1, 3)}
+            for meal_id in meal_ids
+            for food_id in rng.sample(food_ids, min(config.foods_per_meal, len(food_ids)))
+        ]
+        if food_meals:
+            await db.execute(insert(FoodMeal), food_meals)
+        if meal_ids:
+            await refresh_meals(db, meal_ids)
+
+        # Series repartidas por los últimos `progress_days` días
+        now = datetime.now(UTC)
+        progress = [
+            {
+                'user_id': client_id,
+                'exercise_id': rng.choice(exercise_ids),
+                'weight': round(rng.uniform(10, 150), 1),
+                'repetitions': rng.randint(1, 15),
+                'recorded_at': now - timedelta(seconds=rng.uniform(0, config.progress_days * 86400)),
+            }
+            for client_id in client_ids for _ in range(config.progress_per_client)
+        ] if exercise_ids else []
+        if progress:
+            await db.execute(insert(ExerciseProgress), progress)
+
+        await db.commit()
+
+    # Las series de meses sin partición pasan de la partición por defecto a la suya
+    async with Database.engine.connect() as conn:
+        await maintain(conn)
+
+    seeded.trainers = trainer_names
+    seeded.clients = client_names
+    seeded.clients_by_trainer = {
+        name: client_ids[t * config.clients_per_trainer:(t + 1) * config.clients_per_trainer]
+        for t, name in enumerate(trainer_names)
+    }
+    seeded.exercise_ids = exercise_ids
+    seeded.food_names = food_names
+    seeded.rows = {
+        'users': len(user_ids),
+        'exercises': len(exercise_ids),
+        'foods': len(food_ids),
+        'routines': len(routine_ids),
+        'routine_exercise': len(routine_exercises),
+        'diets': len(diet_ids),
+        'meals': len(meal_ids),
+        'food_meal': len(food_meals),
+        'exercise_progress': len(progress),
+    }
+    return seeded
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Una opción --xxx por cada campo de SeedConfig."""
+    for config_field in fields(SeedConfig):
+        parser.add_argument(f'--{config_field.name.replace("_", "-")}', type=int, default=config_field.default)
+
+
+def config_from_args(args: argparse.Namespace) -> SeedConfig:
+    return SeedConfig(**{config_field.name: getattr(args, config_field.name) for config_field in fields(SeedConfig)})
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        '--url', default=None, help='postgresql:// URL (por defecto, a partir de DB_USER/DB_PASS/DB_NAME)',
+    )
+    parser.add_argument('--run', default=None, help='prefijo de los nombres generados (por defecto, uno nuevo)')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    db_url = args.url or default_url()
+    Database.migrate(db_url)
+    Database.init(db_url)
+
+    start = time.perf_counter()
+    seeded = await seed(config_from_args(args), args.run or f'bench-{time.time_ns()}')
+    elapsed = time.perf_counter() - start
+    await Database.engine.dispose()
+
+    print(f'{sum(seeded.rows.values())} filas en {elapsed:.1f} s')
+    for table, rows in seeded.rows.items():
+        print(f'  {table:<18} {rows}')
+    print(f'usuarios: {seeded.trainers[0]} ... / {seeded.clients[0]} ... (contraseña {PASSWORD})')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+"""Serialización de GET /diets/: un modelo por objeto + FastAPI vs un árbol validado de una vez + pydantic-core.
+
+Construye en memoria (sin base de datos) una página de dietas con `--meals` comidas en total y
+`--foods` alimentos por comida, con objetos que imitan las filas que carga diet_tree_query, y mide
+el paso de esas filas a bytes de dos formas:
+
+- antes: diet_to_response construyendo un modelo por objeto (FoodData.model_validate por alimento),
+  y la respuesta pasada por fastapi.routing.serialize_response (que la vuelve a validar contra
+  response_model y la convierte con jsonable_encoder) y JSONResponse;
+- ahora: diet_to_response (diccionarios y una sola validación por dieta) y
+  app.responses.model_response, que la pasa a bytes directamente con pydantic-core.
+
+    python -m benchmarks.serialization --meals 500
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.nutrition import NutritionTotals
+from app.pagination import Page
+from app.responses import model_response
+from app.routers.diets import DietResponse, diet_to_response
+from app.routers.meal import FoodMealResponse, MealFoodData, MealResponse
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+
+MEALS_PER_DIET = 5
+
+
+def build_diets(meals: int, foods: int) -> list[SimpleNamespace]:
+    food_rows = [
+        SimpleNamespace(
+            id=i,
+            name=f'Alimento {i}',
+            serving='100 g',
+            calories=100.0 + i,
+            fats=5.0,
+            carbs=10.0,
+            protein=8.0,
+            url=f'https://example.com/foods/{i}',
+            external_id=None,
+        )
+        for i in range(200)
+    ]
+    meal_rows = [
+        SimpleNamespace(
+            id=i,
+            name=f'Comida {i}',
+            nutrition=[500.0, 50.0, 20.0, 30.0],
+            food_meals=[
+                SimpleNamespace(id=i * foods + j, servings=1 + j, food=food_rows[(i + j) % len(food_rows)])
+                for j in range(foods)
+            ],
+        )
+        for i in range(meals)
+    ]
+    return [
+        SimpleNamespace(
+            id=i,
+            name=f'Dieta {i}',
+            trainer_id=1,
+            client_id=2,
+            created_at=datetime.now(UTC),
+            nutrition=[2500.0, 250.0, 100.0, 150.0],
+            meals=meal_rows[start:start + MEALS_PER_DIET],
+        )
+        for i, start in enumerate(range(0, meals, MEALS_PER_DIET))
+    ]
+
+
+def validated_diet_to_response(diet: Any) -> DietResponse:
+    """diet_to_response tal y como era antes."""
+    meals_response = [
+        MealResponse(
+            id=meal.id,
+            name=meal.name,
+            foods=[
+                FoodMealResponse(id=fm.id, servings=fm.servings, food=MealFoodData.model_validate(fm.food))
+                for fm in meal.food_meals
+            ],
+            totals=NutritionTotals.from_values(meal.nutrition),
+        )
+        for meal in diet.meals
+    ]
+    return DietResponse(
+        id=diet.id,
+        name=diet.name,
+        trainer_id=diet.trainer_id,
+        client_id=diet.client_id,
+        created_at=diet.created_at,
+        meals=meals_response,
+        totals=NutritionTotals.from_values(diet.nutrition),
+    )
+
+
+async def before(diets: list[Any]) -> bytes:
+    field = create_model_field(name='Response_get_all_diets', type_=Page[DietResponse], mode='serialization')
+    page = Page[DietResponse](items=[validated_diet_to_response(diet) for diet in diets])
+    content = await serialize_response(field=field, response_content=page, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def after(diets: list[Any]) -> bytes:
+    page = Page.model_construct(items=[diet_to_response(diet) for diet in diets], next_after=None)
+    return model_response(page).body
+
+
+async def measure(run: Callable[[list[Any]], Awaitable[bytes]], diets: list[Any], iterations: int) -> tuple[float, int]:
+    size = len(await run(diets))  # calentamiento
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await run(diets)
+    return (time.perf_counter() - start) / iterations, size
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--meals', type=int, default=500)
+    parser.add_argument('--foods', type=int, default=5, help='alimentos por comida')
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    diets = build_diets(args.meals, args.foods)
+    for name, run in (('antes', before), ('ahora', after)):
+        elapsed, size = await measure(run, diets, args.iterations)
+        print(
+            f'{name:<6} {len(diets)} dietas / {args.meals} comidas: '
+            f'{elapsed * 1000:8.2f} ms por respuesta ({size} bytes)',
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
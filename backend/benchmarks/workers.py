@@ -0,0 +1,176 @@
+"""Escalado con el número de workers de `python -m app`.
+
+Arranca el servidor con 1, 2, 4... workers (sin SSL, en localhost) y lo somete a carga con
+`--concurrency` peticiones simultáneas durante `--duration` segundos. Mide dos escenarios con
+mucha CPU en Python: GET /diets/ (serialización del árbol) y POST /auth/login (bcrypt).
+
+Con un solo proceso el throughput se queda en lo que da un núcleo; con N workers debería crecer
+hasta el número de CPUs. Escribe datos en la base de datos indicada: usar una de pruebas.
+
+    python -m benchmarks.workers --workers 1,2,4
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import TYPE_CHECKING
+
+import httpx
+from sqlalchemy import insert, select
+
+from app.database import Database
+from app.models.user import User
+from app.passwords import bcrypt_context
+from app.routers.imports import ImportDiet, ImportFood, ImportMeal, PlanImport, import_plan
+from benchmarks.async_db import default_url
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+PASSWORD = 'bench-password'  # noqa: S105
+DIETS = 50
+
+
+async def seed(run: str) -> str:
+    """Crea un entrenador con DIETS dietas completas. Devuelve su nombre de usuario."""
+    username = f'bench-workers-{run}'
+    async with Database.new_session() as db:
+        await db.execute(insert(User), [
+            {
+                'username': name,
+                'email': f'{name}@example.com',
+                'hashed_password': bcrypt_context.hash(PASSWORD),
+                'first_name': 'Bench',
+                'last_name': 'Workers',
+                'is_admin': is_admin,
+            }
+            for name, is_admin in ((username, True), (f'{username}-client', False))
+        ])
+        trainer_id, client_id = (await db.scalars(
+            select(User.id).where(User.username.in_([username, f'{username}-client'])).order_by(User.id),
+        )).all()
+
+        await import_plan(db, trainer_id, PlanImport(diets=[
+            ImportDiet(name=f'Dieta {i}', client_id=client_id, meals=[
+                ImportMeal(name=f'Comida {j}', foods=[
+                    ImportFood(name=f'bench-food-{k}', serving='100 g', calories=100, servings=1 + k)
+                    for k in range(5)
+                ])
+                for j in range(4)
+            ])
+            for i in range(DIETS)
+        ]))
+
+    return username
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen[bytes]:
+    env = {**os.environ, 'DB_HOST': os.getenv('DB_HOST', 'localhost')}
+    return subprocess.Popen(
+        [
+            sys.executable, '-m', 'app',
+            '--workers', str(workers), '--host', '127.0.0.1', '--port', str(port), '--no-ssl',
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.get('/auth/me')
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+
+    msg = 'server did not start'
+    raise RuntimeError(msg)
+
+
+async def load(
+        client: httpx.AsyncClient,
+        request: Callable[[], httpx.Request],
+        concurrency: int,
+        duration: float,
+) -> tuple[int, list[float]]:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def user() -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.send(request())
+            if response.status_code >= 400:  # noqa: PLR2004
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return errors, latencies
+
+
+async def measure(workers: int, port: int, username: str, concurrency: int, duration: float) -> None:
+    server = start_server(workers, port)
+    try:
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits, timeout=60) as client:
+            await wait_ready(client)
+            login = await client.post('/auth/login', data={'username': username, 'password': PASSWORD})
+            headers = {'Authorization': f'Bearer {login.json()["access_token"]}'}
+
+            scenarios = {
+                'GET /diets/': lambda: client.build_request('GET', '/diets/', headers=headers),
+                'POST /auth/login': lambda: client.build_request(
+                    'POST', '/auth/login', data={'username': username, 'password': PASSWORD},
+                ),
+            }
+            for name, request in scenarios.items():
+                # Calentamiento: conexiones abiertas en todos los workers
+                await load(client, request, concurrency, 1)
+                errors, latencies = await load(client, request, concurrency, duration)
+                latencies.sort()
+                print(
+                    f'{workers:>2} workers  {name:<18} {len(latencies) / duration:8.1f} req/s | '
+                    f'p50 {statistics.median(latencies) * 1000:7.1f} ms | '
+                    f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.1f} ms | errores {errors}',
+                )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        '--url', default=None, help='postgresql:// URL (por defecto, a partir de DB_USER/DB_PASS/DB_NAME)',
+    )
+    parser.add_argument('--workers', default=','.join(str(n) for n in (1, 2, 4) if n <= (os.cpu_count() or 1)) or '1')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    db_url = args.url or default_url()
+    Database.migrate(db_url)
+    Database.init(db_url)
+    username = await seed(str(time.time_ns()))
+    await Database.engine.dispose()
+
+    print(f'CPUs: {os.cpu_count()}')
+    for workers in (int(n) for n in args.workers.split(',')):
+        await measure(workers, args.port, username, args.concurrency, args.duration)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+"""Pruebas contra PostgreSQL.
+
+Necesitan una base de datos desechable en TEST_DATABASE_URL (postgresql://...): se migra a head y las
+pruebas escriben en ella. Sin TEST_DATABASE_URL, las pruebas que usan `database` se saltan.
+
+    TEST_DATABASE_URL=postgresql://wf:wf@localhost:5432/wf_test python -m pytest
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from collections.abc import Callable, Coroutine
+from typing import Any, TypeVar
+
+import pytest
+
+
+# auth lee la configuración del token al importarse
+os.environ.setdefault('SECRET_KEY', 'test-secret')
+os.environ.setdefault('ALGORITHM', 'HS256')
+
+from app.database import Database
+
+
+T = TypeVar('T')
+Runner = Callable[[Coroutine[Any, Any, T]], T]
+
+
+@pytest.fixture(scope='session')
+def database() -> str:
+    db_url = os.getenv('TEST_DATABASE_URL')
+    if not db_url:
+        pytest.skip('TEST_DATABASE_URL no está configurada')
+
+    Database.migrate(db_url)
+    Database.init(db_url)
+    return db_url
+
+
+@pytest.fixture
+def run(database: str) -> Runner:  # noqa: ARG001
+    """Ejecuta una corrutina en un bucle nuevo; el pool se vacía al acabar (sus conexiones son de ese bucle)."""
+    def run(coroutine: Coroutine[Any, Any, T]) -> T:
+        async def wrapper() -> T:
+            try:
+                return await coroutine
+            finally:
+                await Database.engine.dispose()
+
+        return asyncio.run(wrapper())
+
+    return run
@@ -0,0 +1,30 @@
+"""Datos para las pruebas: cada llamada crea filas nuevas, con nombres únicos."""
+from __future__ import annotations
+
+import uuid
+from typing import TYPE_CHECKING
+
+from app.models.user import User
+from app.routers.auth import AuthUser
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def unique(prefix: str) -> str:
+    return f'{prefix}-{uuid.uuid4().hex[:12]}'
+
+
+async def add_user(db: AsyncSession, *, is_admin: bool = False) -> AuthUser:
+    username = unique('user')
+    user = User(
+        username=username, email=f'{username}@example.com', hashed_password='-',
+        first_name='Test', last_name='User', is_admin=is_admin,
+    )
+    db.add(user)
+    await db.flush()
+
+    return AuthUser(
+        user_id=user.id, username=username, first_name='Test', last_name='User', is_admin=is_admin,
+    )
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import uuid
+from typing import TYPE_CHECKING
+
+import httpx
+from app.__main__ import create_app
+from app.database import Database
+from app.routers import auth
+from sqlalchemy import text
+
+
+if TYPE_CHECKING:
+    import pytest
+
+    from tests.conftest import Runner
+
+
+async def login(client: httpx.AsyncClient, username: str) -> dict[str, str]:
+    response = await client.post('/auth/', json={
+        'username': username, 'email': f'{username}@example.com', 'password': 'secret',
+        'first_name': 'Test', 'last_name': 'User',
+    })
+    assert response.status_code == 201
+    response = await client.post('/auth/login', data={'username': username, 'password': 'secret'})
+    assert response.status_code == 200
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+
+def test_deleted_user_token_is_rejected(run: Runner, monkeypatch: pytest.MonkeyPatch) -> None:
+    # Cada petición se pone al día con la base de datos, como tras AUTH_VERSION_REFRESH segundos
+    monkeypatch.setattr(auth.token_versions, 'refresh_interval', 0)
+    username = f'deleted-{uuid.uuid4().hex[:12]}'
+
+    async def scenario() -> tuple[int, int]:
+        transport = httpx.ASGITransport(app=create_app())
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            headers = await login(client, username)
+            before = await client.get('/auth/me', headers=headers)
+
+            # Borrado fuera del ORM, como lo haría otro worker o una herramienta de administración
+            async with Database.engine.begin() as conn:
+                await conn.execute(text('DELETE FROM users WHERE username = :username'), {'username': username})
+
+            after = await client.get('/auth/me', headers=headers)
+            return before.status_code, after.status_code
+
+    assert run(scenario()) == (200, 404)
+
+
+def test_profile_changed_by_another_process_is_reloaded(run: Runner, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(auth.token_versions, 'refresh_interval', 0)
+    username = f'renamed-{uuid.uuid4().hex[:12]}'
+
+    async def scenario() -> list[str]:
+        transport = httpx.ASGITransport(app=create_app())
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            headers = await login(client, username)
+            names = []
+            # Cambios fuera del ORM (el trigger sube token_version): este proceso solo los ve en users
+            for first_name in ('Second', 'Third'):
+                async with Database.engine.begin() as conn:
+                    await conn.execute(
+                        text('UPDATE users SET first_name = :first_name WHERE username = :username'),
+                        {'first_name': first_name, 'username': username},
+                    )
+                names.append((await client.get('/auth/me', headers=headers)).json()['first_name'])
+            return names
+
+    assert run(scenario()) == ['Second', 'Third']
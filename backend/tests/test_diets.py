@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from app.database import Database
+from app.etags import Validator
+from app.models.diet import Diet
+from app.models.food import Food
+from app.models.food_meal import FoodMeal
+from app.models.meal import Meal
+from app.nutrition import refresh_meals
+from app.pagination import PageParams
+from app.routers.diets import get_all_diets
+from sqlalchemy import event, select
+
+from tests.helpers import add_user, unique
+
+
+if TYPE_CHECKING:
+    from app.routers.auth import AuthUser
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from tests.conftest import Runner
+
+
+PAGE = PageParams(limit=100, after=None, stream=False)
+FRESH = Validator(etag='', not_modified=False)
+
+
+async def add_diets(db: AsyncSession, count: int) -> AuthUser:
+    """Un entrenador con `count` dietas de dos comidas con dos alimentos cada una."""
+    trainer = await add_user(db, is_admin=True)
+    client = await add_user(db)
+    for _ in range(count):
+        db.add(Diet(name=unique('diet'), trainer_id=trainer.user_id, client_id=client.user_id, meals=[
+            Meal(name=unique('meal'), food_meals=[
+                FoodMeal(servings=2, food=Food(name=unique('food'), serving='100 g', calories=100, url=''))
+                for _ in range(2)
+            ])
+            for _ in range(2)
+        ]))
+    await db.flush()
+    await refresh_meals(db)
+    await db.commit()
+
+    return trainer
+
+
+async def count_statements(user: AuthUser) -> int:
+    statements = 0
+
+    def count(*args: object) -> None:  # noqa: ARG001
+        nonlocal statements
+        statements += 1
+
+    async with Database.new_session() as db:
+        event.listen(Database.engine.sync_engine, 'before_cursor_execute', count)
+        try:
+            await get_all_diets(db, user, PAGE, FRESH)
+        finally:
+            event.remove(Database.engine.sync_engine, 'before_cursor_execute', count)
+
+    return statements
+
+
+def test_diet_tree_query_count_does_not_grow_with_diets(run: Runner) -> None:
+    async def scenario() -> tuple[int, int]:
+        async with Database.new_session() as db:
+            one = await add_diets(db, 1)
+            many = await add_diets(db, 20)
+
+        return await count_statements(one), await count_statements(many)
+
+    one, many = run(scenario())
+    assert one == many
+
+
+def test_diet_foods_keep_the_foods_primary_key(run: Runner) -> None:
+    async def scenario() -> tuple[list[dict], set[int]]:
+        async with Database.new_session() as db:
+            trainer = await add_diets(db, 1)
+            response = await get_all_diets(db, trainer, PAGE, FRESH)
+            foods = [
+                food_meal['food']
+                for diet in json.loads(response.body)['items']
+                for meal in diet['meals']
+                for food_meal in meal['foods']
+            ]
+            food_ids = set(await db.scalars(select(Food.id).where(Food.id.in_([food['id'] for food in foods]))))
+        return foods, food_ids
+
+    foods, food_ids = run(scenario())
+    assert len(foods) == 4
+    # Alimentos propios, sin id de FatSecret: id sigue siendo la clave de foods
+    assert {food['id'] for food in foods} == food_ids
+    assert all(food['external_id'] is None for food in foods)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import random
+from typing import TYPE_CHECKING
+
+from app.database import Database
+from app.models.food import Food
+from app.models.meal import Meal
+from app.models.meal_nutrition import MealNutrition
+from app.nutrition import init_meal
+from app.routers.food import FoodDataForAdd, add_foods_to_meal
+from sqlalchemy import func, select
+
+from tests.helpers import add_user, unique
+
+
+if TYPE_CHECKING:
+    from app.routers.food import FoodBatchResult
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from tests.conftest import Runner
+
+
+def external_id() -> int:
+    # Fuera del rango de los id de FatSecret reales, distinto en cada llamada
+    return random.randrange(10**12, 10**13)  # noqa: S311
+
+
+def food_data(name: str, servings: int = 1, calories: float = 100, **fields: int | None) -> FoodDataForAdd:
+    return FoodDataForAdd(
+        name=name, serving='100 g', calories=calories, fats=1, carbs=2, protein=3, url='', servings=servings, **fields,
+    )
+
+
+async def add_meal(db: AsyncSession) -> Meal:
+    meal = Meal(name=unique('meal'))
+    db.add(meal)
+    await db.flush()
+    await init_meal(db, meal)
+    await db.commit()
+    return meal
+
+
+async def add_food(db: AsyncSession, name: str, **fields: int | None) -> Food:
+    food = Food(name=name, serving='100 g', calories=100, fats=1, carbs=2, protein=3, url='', **fields)
+    db.add(food)
+    await db.commit()
+    return food
+
+
+async def add_batch(foods: list[FoodDataForAdd]) -> tuple[FoodBatchResult, float]:
+    """Añade el lote a una comida nueva; devuelve el resultado y las calorías que suma la comida."""
+    async with Database.new_session() as db:
+        trainer = await add_user(db, is_admin=True)
+        meal = await add_meal(db)
+        result = await add_foods_to_meal(meal.id, foods, db, trainer)
+        calories = await db.scalar(select(MealNutrition.calories).where(MealNutrition.meal_id == meal.id))
+    return result, calories
+
+
+def test_fatsecret_id_sent_as_id_reuses_the_stored_food(run: Runner) -> None:
+    async def scenario() -> tuple[int, FoodBatchResult, float, int]:
+        fatsecret_id = external_id()
+        async with Database.new_session() as db:
+            stored = await add_food(db, unique('food'), external_id=fatsecret_id)
+        # Como los clientes que copian un resultado de búsqueda: id de FatSecret, sin external_id
+        result, calories = await add_batch([food_data(unique('renamed'), servings=2, calories=999, id=fatsecret_id)])
+        async with Database.new_session() as db:
+            copies = await db.scalar(select(func.count()).where(Food.external_id == fatsecret_id))
+        return stored.id, result, calories, copies
+
+    stored_id, result, calories, copies = run(scenario())
+    assert [(item.food_id, item.food) for item in result.items] == [(stored_id, 'existing')]
+    # Cuentan las macros guardadas, no las de la petición
+    assert calories == 200
+    assert copies == 1
+
+
+def test_batch_reports_created_and_existing_foods(run: Runner) -> None:
+    names = {key: unique(key) for key in ('fatsecret', 'new-fatsecret', 'custom', 'new-custom')}
+    fatsecret_id, new_fatsecret_id = external_id(), external_id()
+
+    async def scenario() -> tuple[dict[str, int], FoodBatchResult, float, list[int]]:
+        async with Database.new_session() as db:
+            stored = {
+                'fatsecret': (await add_food(db, names['fatsecret'], external_id=fatsecret_id)).id,
+                'custom': (await add_food(db, names['custom'])).id,
+            }
+        result, calories = await add_batch([
+            food_data(names['fatsecret'], external_id=fatsecret_id),
+            food_data(names['new-fatsecret'], external_id=new_fatsecret_id),
+            food_data(names['custom'], calories=999),
+            food_data(names['new-custom']),
+            # Repetidos dentro del lote (uno con el id de FatSecret en id): se guardan una sola vez
+            food_data(names['new-fatsecret'], id=new_fatsecret_id),
+            food_data(names['new-custom']),
+        ])
+        async with Database.new_session() as db:
+            copies = await db.scalars(
+                select(func.count()).select_from(Food).where(Food.name.in_(names.values())).group_by(Food.name),
+            )
+            return stored, result, calories, list(copies)
+
+    stored, result, calories, copies = run(scenario())
+    items = result.items
+    assert [item.index for item in items] == list(range(6))
+    assert [item.food for item in items] == ['existing', 'created', 'existing', 'created', 'created', 'created']
+    assert [items[0].food_id, items[2].food_id] == [stored['fatsecret'], stored['custom']]
+    assert [items[4].food_id, items[5].food_id] == [items[1].food_id, items[3].food_id]
+    assert len({item.food_meal_id for item in items}) == 6
+    # Cada alimento una sola vez en foods
+    assert copies == [1, 1, 1, 1]
+    # Seis raciones de 100 kcal: el alimento propio que ya existía cuenta con sus macros, no con las 999 del lote
+    assert calories == 600
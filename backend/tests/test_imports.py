@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from app.database import Database
+from app.models.exercise import Exercise
+from app.models.user import User
+from app.routers.imports import import_plan, parse_plan_csv
+from sqlalchemy import func, select
+
+from tests.helpers import add_user, unique
+
+
+if TYPE_CHECKING:
+    from app.routers.imports import ImportReport
+
+    from tests.conftest import Runner
+
+
+HEADER = 'kind,plan,client_id,description,exercise_id,reps_min,reps_max,sets,meal,food,serving,calories,servings\n'
+
+
+def test_csv_rows_are_grouped_by_plan_client_and_meal() -> None:
+    plan, errors = parse_plan_csv(HEADER + (
+        'routine,Fuerza,7,Lunes,1,8,12,3,,,,,\n'
+        'routine,Fuerza,7,,2,,,,,,,,\n'
+        'routine,Fuerza,8,,1,,,,,,,,\n'
+        'routine,Vacía,7,,,,,,,,,,\n'
+        'diet,Volumen,7,,,,,,Desayuno,Avena,100 g,380,1\n'
+        'diet,Volumen,7,,,,,,Comida,Arroz,100 g,130,2\n'
+        'diet,Volumen,7,,,,,,Desayuno,Leche,200 ml,120,1\n'
+        'diet,Volumen,7,,,,,,Cena,,,,\n'
+    ))
+
+    assert errors == []
+    assert [(r.name, r.client_id, r.description, [e.exercise_id for e in r.exercises]) for r in plan.routines] == [
+        ('Fuerza', 7, 'Lunes', [1, 2]),
+        ('Fuerza', 8, None, [1]),
+        ('Vacía', 7, None, []),
+    ]
+    assert plan.routines[0].exercises[0].model_dump() == {'exercise_id': 1, 'reps_min': 8, 'reps_max': 12, 'sets': 3}
+    [diet] = plan.diets
+    assert (diet.name, diet.client_id, diet.ref) == ('Volumen', 7, 'line 6')
+    assert [(meal.name, [(food.name, food.servings) for food in meal.foods]) for meal in diet.meals] == [
+        ('Desayuno', [('Avena', 1), ('Leche', 1)]),
+        ('Comida', [('Arroz', 2)]),
+        ('Cena', []),
+    ]
+    assert diet.meals[0].foods[0].calories == 380
+
+
+def test_csv_malformed_rows_are_reported_and_skipped() -> None:
+    plan, errors = parse_plan_csv(HEADER + (
+        'routine,Fuerza,7,,1,,,,,,,,\n'
+        'routine,Fuerza,7,,dos,,,,,,,,\n'
+        'diet,Volumen,7,,,,,,Desayuno,Avena,100 g,mucho,1\n'
+        'diet,Volumen,7,,,,,,,Arroz,100 g,130,1\n'
+        'diet,Volumen,7,,,,,,Comida,Pan,,,1\n'
+        'plan,Otro,7,,,,,,,,,,\n'
+        ',Otro,7,,,,,,,,,,\n'
+    ))
+
+    assert [(error.ref, error.detail.split(':')[0]) for error in errors] == [
+        ('line 3', 'exercise_id'),
+        ('line 4', 'calories'),
+        ('line 5', 'Falta la columna meal.'),
+        ('line 6', 'serving'),
+        ('line 7', 'Tipo de fila desconocido'),
+        ('line 8', 'Tipo de fila desconocido'),
+    ]
+    # Las filas válidas se importan igualmente
+    assert [e.exercise_id for e in plan.routines[0].exercises] == [1]
+    assert [(meal.name, meal.foods) for meal in plan.diets[0].meals] == [('Desayuno', []), ('Comida', [])]
+
+
+def test_csv_import_reports_unknown_references_and_creates_unknown_foods(run: Runner) -> None:
+    food = unique('food')
+
+    async def scenario() -> tuple[ImportReport, int]:
+        async with Database.new_session() as db:
+            trainer = await add_user(db, is_admin=True)
+            client = await add_user(db)
+            exercise = Exercise(name=unique('exercise'))
+            db.add(exercise)
+            await db.commit()
+            missing_exercise = await db.scalar(select(func.max(Exercise.id))) + 1
+            missing_client = await db.scalar(select(func.max(User.id))) + 1
+
+            plan, errors = parse_plan_csv(HEADER + (
+                f'routine,Fuerza,{client.user_id},,{exercise.id},,,,,,,,\n'
+                f'routine,Fantasma,{client.user_id},,{missing_exercise},,,,,,,,\n'
+                f'diet,Volumen,{client.user_id},,,,,,Desayuno,{food},100 g,380,1\n'
+                f'diet,Volumen,{client.user_id},,,,,,Comida,{food},100 g,380,2\n'
+                f'diet,Nadie,{missing_client},,,,,,Desayuno,{food},100 g,380,1\n'
+            ))
+            assert errors == []
+            return await import_plan(db, trainer.user_id, plan), missing_exercise
+
+    report, missing_exercise = run(scenario())
+    assert (report.routines, report.diets, report.meals) == (1, 1, 2)
+    # El alimento no existía: se crea una vez y lo usan las dos comidas
+    assert report.foods == 1
+    assert [(error.ref, error.detail) for error in report.errors] == [
+        ('line 3', f'Ejercicios no encontrados: {missing_exercise}'),
+        ('line 6', 'Cliente no encontrado.'),
+    ]
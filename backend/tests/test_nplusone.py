@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import httpx
+from app.__main__ import create_app
+from app.database import Database
+from app.models.exercise import Exercise
+from app.nplusone import NPlusOneDetector
+from app.routers.auth import get_current_user
+
+from tests.helpers import add_user, unique
+
+
+if TYPE_CHECKING:
+    import pytest
+
+    from tests.conftest import Runner
+
+
+def test_detector_allows_bulk_inserts(run: Runner, monkeypatch: pytest.MonkeyPatch) -> None:
+    # POST /routines/ inserta sus ejercicios con un INSERT por lotes del ORM, que no se puede compilar suelto
+    monkeypatch.setattr(Database, '_nplusone', NPlusOneDetector(mode='raise'))
+
+    async def scenario() -> httpx.Response:
+        async with Database.new_session() as db:
+            trainer = await add_user(db, is_admin=True)
+            client = await add_user(db)
+            exercises = [Exercise(name=unique('exercise')) for _ in range(3)]
+            db.add_all(exercises)
+            await db.commit()
+            exercise_ids = [exercise.id for exercise in exercises]
+
+        app = create_app()
+        app.dependency_overrides[get_current_user] = lambda: trainer
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as http:
+            return await http.post('/routines/', json={
+                'name': unique('routine'),
+                'client_id': client.user_id,
+                'exercises': [{'exercise_id': exercise_id} for exercise_id in exercise_ids],
+            })
+
+    response = run(scenario())
+    assert response.status_code == 201, response.text
+    assert len(response.json()['exercises']) == 3
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
+
+import pytest
+from app.database import Database
+from app.models.exercise import Exercise
+from app.routers.progress import Bucket, ProgressBatch, ProgressSet, get_progress, record_progress
+
+from tests.helpers import add_user, unique
+
+
+if TYPE_CHECKING:
+    from app.routers.progress import ProgressSeries
+
+    from tests.conftest import Runner
+
+
+@pytest.mark.parametrize(('bucket', 'max_points', 'tz'), (
+    (Bucket.AUTO, 10, 'UTC'),
+    (Bucket.DAY, 10, 'Europe/Madrid'),
+    (Bucket.MONTH, 7, 'America/New_York'),
+    (Bucket.AUTO, 1, 'UTC'),
+))
+def test_long_range_never_exceeds_max_points(run: Runner, bucket: Bucket, max_points: int, tz: str) -> None:
+    end = datetime.now(UTC)
+    start = end - timedelta(days=5 * 365)
+
+    async def scenario() -> ProgressSeries:
+        async with Database.new_session() as db:
+            user = await add_user(db)
+            exercise = Exercise(name=unique('exercise'))
+            db.add(exercise)
+            await db.flush()
+            # Una serie cada dos semanas durante cinco años
+            await record_progress(ProgressBatch(sets=[
+                ProgressSet(
+                    exercise_id=exercise.id, weight=50, repetitions=5, recorded_at=start + timedelta(weeks=week),
+                )
+                for week in range(0, 5 * 52, 2)
+            ]), db, user)
+
+            return await get_progress(
+                exercise.id, db, user, start=start, end=end, bucket=bucket, max_points=max_points, tz=tz,
+            )
+
+    series = run(scenario())
+    assert 0 < len(series.points) <= max_points
+    assert sum(point.sets for point in series.points) == 130
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from tools.query_plan_check import MAX_REMOVED, MIN_ROWS, SEED_ROWS, analyze, check, is_seeded, seed
+
+
+if TYPE_CHECKING:
+    from tools.query_plan_check import Finding
+
+    from tests.conftest import Runner
+
+
+@pytest.mark.slow
+def test_handlers_avoid_bad_plans(run: Runner) -> None:
+    """Las mismas comprobaciones que `python -m tools.query_plan_check --seed` (la siembra, solo la primera vez)."""
+    async def scenario() -> list[Finding]:
+        if not await is_seeded():
+            await seed(SEED_ROWS)
+        await analyze()
+        return await check(MIN_ROWS, MAX_REMOVED, verbose=False)
+
+    findings = run(scenario())
+    assert not findings, '\n'.join(map(str, findings))
@@ -0,0 +1,188 @@
+"""Mantenimiento de las particiones mensuales de exercise_progress.
+
+- Crea por adelantado las particiones de los próximos `--ahead` meses, y las de los meses cuyas series
+  hayan acabado en la partición por defecto (fechas fuera de las particiones que había); esas filas
+  se mueven a su partición.
+- Con `--retain N`, desengancha las particiones de los meses anteriores a los últimos N: pasan al
+  esquema `--archive-schema` (siguen en la base de datos, pero las consultas ya no las ven) o, con
+  `--drop`, se borran.
+
+Pensado para ejecutarse periódicamente (p. ej. a diario desde cron); si no hay nada que hacer, no cambia nada.
+
+    python -m tools.progress_partitions --ahead 3 --retain 24
+    python -m tools.progress_partitions --retain 24 --drop --dry-run
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import UTC, date, datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+
+from app.database import Database, database_url
+from app.models.exercise_progress import DEFAULT_PARTITION, PARTITION_NAME, is_partition
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+AHEAD_MONTHS = 3
+ARCHIVE_SCHEMA = 'archive'
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return PARTITION_NAME.format(year=month.year, month=month.month)
+
+
+def bounds(month: date) -> str:
+    # Límites en UTC, como los de la migración
+    return f"FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+
+
+async def partitions(conn: AsyncConnection) -> dict[date, str]:
+    """Particiones mensuales enganchadas ahora mismo, por mes."""
+    names = await conn.scalars(text("""
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = 'exercise_progress'::regclass
+    """))
+    return {
+        date(int(name[-7:-3]), int(name[-2:]), 1): name
+        for name in names if is_partition(name) and name != DEFAULT_PARTITION
+    }
+
+
+async def default_months(conn: AsyncConnection) -> set[date]:
+    """Meses que tienen filas en la partición por defecto."""
+    months = await conn.scalars(text(f"""
+        SELECT DISTINCT date_trunc('month', recorded_at AT TIME ZONE 'UTC')::date FROM {DEFAULT_PARTITION}
+    """))
+    return set(months)
+
+
+def create_statements(month: date, *, has_default_rows: bool) -> list[str]:
+    name = partition_name(month)
+    if not has_default_rows:
+        return [f'CREATE TABLE {name} PARTITION OF exercise_progress FOR VALUES {bounds(month)}']
+
+    # Con filas de ese mes en la partición por defecto no se puede crear la partición directamente:
+    # se crea suelta, se le pasan las filas y se engancha. El LOCK evita que entren más mientras tanto.
+    return [
+        f'LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE',
+        f'CREATE TABLE {name} (LIKE exercise_progress INCLUDING DEFAULTS)',
+        f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE recorded_at >= '{month.isoformat()} 00:00:00+00'
+              AND recorded_at < '{add_months(month, 1).isoformat()} 00:00:00+00'
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        """,
+        f'ALTER TABLE exercise_progress ATTACH PARTITION {name} FOR VALUES {bounds(month)}',
+    ]
+
+
+def detach_statements(name: str, archive_schema: str, *, drop: bool) -> list[str]:
+    statements = [f'ALTER TABLE exercise_progress DETACH PARTITION {name}']
+    if drop:
+        statements.append(f'DROP TABLE {name}')
+    else:
+        statements += [
+            # Histórico suelto: sin el DEFAULT nextval(...) ni las claves ajenas, no impide borrar
+            # ejercicios o usuarios ni depende de la secuencia de exercise_progress
+            f'ALTER TABLE {name} ALTER COLUMN id DROP DEFAULT, '
+            'DROP CONSTRAINT IF EXISTS exercise_progress_exercise_id_fkey, '
+            'DROP CONSTRAINT IF EXISTS exercise_progress_user_id_fkey',
+            f'CREATE SCHEMA IF NOT EXISTS {archive_schema}',
+            f'ALTER TABLE {name} SET SCHEMA {archive_schema}',
+        ]
+
+    return statements
+
+
+async def maintain(
+        conn: AsyncConnection,
+        ahead: int = AHEAD_MONTHS,
+        retain: int | None = None,
+        archive_schema: str = ARCHIVE_SCHEMA,
+        *,
+        drop: bool = False,
+        dry_run: bool = False,
+) -> list[str]:
+    """Crea y desengancha las particiones que tocan; devuelve lo que se ha hecho (o se haría, con dry_run)."""
+    current = datetime.now(UTC).date().replace(day=1)
+    existing = await partitions(conn)
+    swept = await default_months(conn)
+    archive_schema = conn.dialect.identifier_preparer.quote(archive_schema)
+    await conn.rollback()
+
+    # Cada mes en su propia transacción: si uno falla, los anteriores ya quedan hechos
+    steps: list[tuple[str, list[str]]] = []
+    wanted = {add_months(current, months) for months in range(ahead + 1)} | swept
+    for month in sorted(wanted - existing.keys()):
+        action = 'creada (con filas de la partición por defecto)' if month in swept else 'creada'
+        steps.append((f'{partition_name(month)}: {action}', create_statements(month, has_default_rows=month in swept)))
+
+    if retain is not None:
+        cutoff = add_months(current, -retain)
+        # También las que se acaban de crear para filas antiguas de la partición por defecto
+        for month in sorted(existing.keys() | swept):
+            if month < cutoff:
+                action = 'borrada' if drop else f'archivada en {archive_schema}'
+                steps.append((f'{partition_name(month)}: {action}', detach_statements(
+                    partition_name(month), archive_schema, drop=drop,
+                )))
+
+    for _, statements in steps:
+        if dry_run:
+            continue
+        async with conn.begin():
+            for statement in statements:
+                await conn.execute(text(statement))
+
+    return [description for description, _ in steps]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        '--url', default=None, help='postgresql:// URL (por defecto, a partir de DB_USER/DB_PASS/DB_NAME)',
+    )
+    parser.add_argument('--ahead', type=int, default=AHEAD_MONTHS, help='meses futuros con partición creada')
+    parser.add_argument(
+        '--retain', type=int, default=None, help='meses pasados que siguen enganchados (por defecto, todos)',
+    )
+    parser.add_argument(
+        '--archive-schema', default=ARCHIVE_SCHEMA, help='esquema al que pasan las particiones antiguas',
+    )
+    parser.add_argument('--drop', action='store_true', help='borrar las particiones antiguas en vez de archivarlas')
+    parser.add_argument('--dry-run', action='store_true', help='mostrar lo que se haría, sin cambiar nada')
+    args = parser.parse_args()
+
+    db_url = args.url or database_url('localhost')
+    Database.migrate(db_url)
+    Database.init(db_url)
+
+    async with Database.engine.connect() as conn:
+        done = await maintain(
+            conn, args.ahead, args.retain, args.archive_schema, drop=args.drop, dry_run=args.dry_run,
+        )
+    await Database.engine.dispose()
+
+    for description in done:
+        print(f'{"(dry-run) " if args.dry_run else ""}{description}')
+    if not done:
+        print('Nada que hacer')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
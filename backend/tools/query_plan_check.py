@@ -0,0 +1,347 @@
+"""Regresiones de planes de consulta en los endpoints más usados.
+
+Ejecuta los handlers de los routers contra una base de datos sembrada, captura cada sentencia SQL
+que emiten y la pasa por EXPLAIN (con ANALYZE en las SELECT). Falla si alguna acaba en un Seq Scan
+sobre una tabla grande, o si un índice devuelve muchas filas que luego se descartan por filtro.
+
+Todo se ejecuta dentro de una transacción que se deshace al final; `--seed` sí escribe datos, así
+que usar una base de datos de pruebas.
+
+    python -m tools.query_plan_check --seed
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Database, database_url
+from app.etags import Validator
+from app.food_search import FoodSearchService, FoodSearchSettings
+from app.nutrition import refresh_meals
+from app.pagination import PageParams
+from app.routers.auth import AuthUser, load_auth_user
+from app.routers.diets import DietCreate, create_diet, get_all_diets, get_diet, get_diet_nutrition, get_diets_nutrition
+from app.routers.exercises import get_all_exercises
+from app.routers.food import FoodDataForAdd, add_food_to_meal
+from app.routers.imports import ImportDiet, ImportFood, ImportMeal, ImportRoutine, PlanImport, import_plan
+from app.routers.meal import MealCreate, create_meal, get_all_meals
+from app.routers.progress import Bucket, ProgressBatch, ProgressSet, get_progress, record_progress
+from app.routers.routines import RoutineCreate, RoutineExerciseCreate, create_routine, get_all_routines
+from tools.progress_partitions import maintain
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+# Tamaño de la siembra (filas de routine_exercise), y a partir de cuántas filas una tabla es grande
+SEED_ROWS = 50_000
+MIN_ROWS = 10_000
+# Filas que un nodo del plan puede descartar por filtro
+MAX_REMOVED = 1_000
+
+PAGE = PageParams(limit=50, after=None, stream=False)
+# Sin If-None-Match: los listados siempre consultan
+FRESH = Validator(etag='', not_modified=False)
+
+SEED = (
+    """
+    INSERT INTO users (username, email, hashed_password, first_name, last_name, is_admin)
+    SELECT 'plan-' || g, 'plan-' || g || '@example.com', '-', 'Plan', g::text, g <= 20
+    FROM generate_series(1, 1000) g
+    """,
+    """
+    INSERT INTO foods (name, serving, calories, carbs, fats, protein, url)
+    SELECT (ARRAY['pollo','arroz','avena','leche','huevo','pan','atun','manzana'])[1 + g % 8] || ' ' || g,
+           '100 g', g % 500, g % 80, g % 30, g % 40, ''
+    FROM generate_series(1, :rows / 2) g
+    """,
+    """
+    INSERT INTO exercises (name) SELECT 'ejercicio ' || g FROM generate_series(1, 1000) g
+    """,
+    """
+    INSERT INTO diets (name, trainer_id, client_id)
+    SELECT 'dieta ' || g, t.lo + g % 20, t.lo + 20 + g % 980
+    FROM generate_series(1, :rows / 5) g, (SELECT min(id) AS lo FROM users WHERE username LIKE 'plan-%') t
+    """,
+    """
+    INSERT INTO meals (diet_id, name)
+    SELECT d.lo + g % (d.hi - d.lo + 1), 'comida ' || g
+    FROM generate_series(1, :rows / 2) g, (SELECT min(id) AS lo, max(id) AS hi FROM diets) d
+    """,
+    """
+    INSERT INTO food_meal (meal_id, food_id, servings)
+    SELECT m.lo + g % (m.hi - m.lo + 1), f.lo + (g * 7919) % (f.hi - f.lo + 1), 1 + g % 3
+    FROM generate_series(1, :rows * 2) g,
+         (SELECT min(id) AS lo, max(id) AS hi FROM meals) m,
+         (SELECT min(id) AS lo, max(id) AS hi FROM foods) f
+    """,
+    """
+    INSERT INTO routines (name, trainer_id, client_id)
+    SELECT 'rutina ' || g, t.lo + g % 20, t.lo + 20 + g % 980
+    FROM generate_series(1, :rows / 5) g, (SELECT min(id) AS lo FROM users WHERE username LIKE 'plan-%') t
+    """,
+    """
+    INSERT INTO routine_exercise (routine_id, exercise_id, min_repeats, max_repeats, set)
+    SELECT r.lo + g % (r.hi - r.lo + 1), e.lo + g % (e.hi - e.lo + 1), 8, 12, 3
+    FROM generate_series(1, :rows) g,
+         (SELECT min(id) AS lo, max(id) AS hi FROM routines) r,
+         (SELECT min(id) AS lo, max(id) AS hi FROM exercises) e
+    """,
+    """
+    INSERT INTO exercise_progress (exercise_id, user_id, weight, repetitions, recorded_at)
+    SELECT e.lo + g % (e.hi - e.lo + 1), t.lo + 20 + g % 980, 20 + g % 100, 1 + g % 12,
+           now() - (g % 365) * interval '1 day'
+    FROM generate_series(1, :rows * 2) g,
+         (SELECT min(id) AS lo, max(id) AS hi FROM exercises) e,
+         (SELECT min(id) AS lo FROM users WHERE username LIKE 'plan-%') t
+    """,
+)
+
+
+@dataclass
+class Context:
+    trainer: AuthUser
+    client: AuthUser
+    diet_id: int
+    meal_ids: list[int]
+    exercise_ids: list[int]
+    food_name: str
+
+
+@dataclass
+class Finding:
+    scenario: str
+    statement: str
+    problems: list[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return f'[{self.scenario}] {"; ".join(self.problems)}\n    {" ".join(self.statement.split())}'
+
+
+class LocalOnlyClient:
+    """Cliente de FatSecret que no se llega a usar: la búsqueda local devuelve suficientes resultados."""
+
+    def foods_search(self, search_expression: str) -> list[dict[str, Any]]:  # noqa: ARG002
+        return []
+
+
+# -------------------------------------------------------------------
+# Escenarios: cada uno llama a un handler como lo haría FastAPI
+# -------------------------------------------------------------------
+async def new_food_search(db: AsyncSession, ctx: Context) -> object:  # noqa: ARG001
+    service = FoodSearchService(LocalOnlyClient(), FoodSearchSettings())
+    return await service.search('pollo', db)
+
+
+async def new_import(db: AsyncSession, ctx: Context) -> object:
+    return await import_plan(db, ctx.trainer.user_id, PlanImport(
+        routines=[ImportRoutine(
+            name='importada', client_id=ctx.client.user_id,
+            exercises=[RoutineExerciseCreate(exercise_id=ctx.exercise_ids[0])],
+        )],
+        diets=[ImportDiet(name='importada', client_id=ctx.client.user_id, meals=[
+            ImportMeal(name='importada', foods=[ImportFood(name=ctx.food_name, serving='100 g', servings=1)]),
+        ])],
+    ))
+
+
+SCENARIOS: dict[str, Callable[[AsyncSession, Context], Awaitable[object]]] = {
+    'auth: load_auth_user': lambda db, ctx: load_auth_user(ctx.client.user_id, db),
+    'GET /diets/ (trainer)': lambda db, ctx: get_all_diets(db, ctx.trainer, PAGE, FRESH),
+    'GET /diets/ (client)': lambda db, ctx: get_all_diets(db, ctx.client, PAGE, FRESH),
+    'GET /diets/{id}': lambda db, ctx: get_diet(ctx.diet_id, db, ctx.client, FRESH),
+    'GET /diets/nutrition': lambda db, ctx: get_diets_nutrition(db, ctx.trainer, PAGE, FRESH),
+    'GET /diets/{id}/nutrition': lambda db, ctx: get_diet_nutrition(ctx.diet_id, db, ctx.client, FRESH),
+    'GET /routines/ (trainer)': lambda db, ctx: get_all_routines(db, ctx.trainer, PAGE, FRESH),
+    'GET /routines/ (client)': lambda db, ctx: get_all_routines(db, ctx.client, PAGE, FRESH),
+    'GET /meals/': lambda db, ctx: get_all_meals(db, ctx.trainer, PAGE),
+    'GET /exercises/': lambda db, ctx: get_all_exercises(db, ctx.trainer, PAGE, FRESH),
+    'POST /foods/search (local)': new_food_search,
+    'POST /meals/': lambda db, ctx: create_meal(MealCreate(name='nueva'), db, ctx.trainer),
+    'POST /foods/meal/{id}': lambda db, ctx: add_food_to_meal(ctx.meal_ids[0], FoodDataForAdd(
+        name=ctx.food_name, serving='100 g', calories=1, fats=1, carbs=1, protein=1, url='', servings=1,
+    ), db, ctx.trainer),
+    'POST /diets/': lambda db, ctx: create_diet(
+        DietCreate(name='nueva', client_id=ctx.client.user_id, meal_ids=ctx.meal_ids), db, ctx.trainer,
+    ),
+    'POST /routines/': lambda db, ctx: create_routine(RoutineCreate(
+        name='nueva', client_id=ctx.client.user_id,
+        exercises=[RoutineExerciseCreate(exercise_id=exercise_id) for exercise_id in ctx.exercise_ids],
+    ), db, ctx.trainer),
+    'POST /import/': new_import,
+    'POST /progress/': lambda db, ctx: record_progress(ProgressBatch(sets=[
+        ProgressSet(exercise_id=exercise_id, weight=60, repetitions=8) for exercise_id in ctx.exercise_ids
+    ]), db, ctx.client),
+    'GET /progress/{id}': lambda db, ctx: get_progress(
+        ctx.exercise_ids[0], db, ctx.client, start=None, end=None, bucket=Bucket.AUTO, max_points=200, tz='UTC',
+    ),
+}
+
+
+# -------------------------------------------------------------------
+# Datos
+# -------------------------------------------------------------------
+async def seed(rows: int) -> None:
+    async with Database.new_session() as db:
+        for statement in SEED:
+            await db.execute(text(statement), {'rows': rows})
+        await refresh_meals(db)
+        await db.commit()
+
+    # Las series sembradas de meses sin partición pasan de la partición por defecto a la suya
+    async with Database.engine.connect() as conn:
+        await maintain(conn)
+
+
+async def is_seeded() -> bool:
+    async with Database.new_session() as db:
+        return bool(await db.scalar(text("SELECT EXISTS (SELECT 1 FROM users WHERE username = 'plan-1')")))
+
+
+async def analyze() -> None:
+    async with Database.engine.connect() as conn:
+        await conn.execute(text('ANALYZE'))
+        await conn.commit()
+
+
+async def load_context(db: AsyncSession) -> Context:
+    def as_auth_user(row: Any) -> AuthUser:
+        return AuthUser(user_id=row.id, username=row.username, first_name=row.first_name,
+                        last_name=row.last_name, is_admin=row.is_admin)
+
+    # El entrenador y el cliente con más dietas: los listados más pesados
+    trainer = (await db.execute(text("""
+        SELECT users.* FROM users JOIN diets ON diets.trainer_id = users.id
+        GROUP BY users.id ORDER BY count(*) DESC LIMIT 1
+    """))).one()
+    client = (await db.execute(text("""
+        SELECT users.* FROM users JOIN diets ON diets.client_id = users.id
+        GROUP BY users.id ORDER BY count(*) DESC LIMIT 1
+    """))).one()
+    diet_id = await db.scalar(text('SELECT max(id) FROM diets WHERE client_id = :id'), {'id': client.id})
+    meal_ids = (await db.scalars(text('SELECT id FROM meals ORDER BY id DESC LIMIT 4'))).all()
+    exercise_ids = (await db.scalars(text('SELECT id FROM exercises ORDER BY id LIMIT 4'))).all()
+    food_name = await db.scalar(text('SELECT name FROM foods ORDER BY id DESC LIMIT 1'))
+
+    return Context(as_auth_user(trainer), as_auth_user(client), diet_id, list(meal_ids), list(exercise_ids), food_name)
+
+
+async def large_tables(conn: AsyncConnection, min_rows: int) -> set[str]:
+    result = await conn.execute(text("""
+        SELECT relname FROM pg_class
+        WHERE relkind IN ('r', 'p') AND relnamespace = 'public'::regnamespace AND reltuples >= :min_rows
+    """), {'min_rows': min_rows})
+    return set(result.scalars())
+
+
+# -------------------------------------------------------------------
+# Planes
+# -------------------------------------------------------------------
+def plan_problems(node: dict[str, Any], tables: set[str], max_removed: int) -> list[str]:
+    problems = []
+    relation = node.get('Relation Name')
+    if node['Node Type'] == 'Seq Scan' and relation in tables:
+        problems.append(f'Seq Scan on {relation}')
+
+    removed = node.get('Rows Removed by Filter', 0) * node.get('Actual Loops', 1)
+    if removed > max_removed:
+        problems.append(f'{node["Node Type"]} on {relation or "?"} discards {removed} rows by filter')
+
+    for child in node.get('Plans', []):
+        problems.extend(plan_problems(child, tables, max_removed))
+
+    return problems
+
+
+async def explain(conn: AsyncConnection, statement: str, parameters: Any) -> dict[str, Any]:
+    # ANALYZE solo en lecturas: en un INSERT/UPDATE ejecutaría la escritura otra vez
+    options = 'ANALYZE, FORMAT JSON' if statement.lstrip().upper().startswith('SELECT') else 'FORMAT JSON'
+    result = await conn.exec_driver_sql(f'EXPLAIN ({options}) {statement}', parameters)
+    plan = result.scalar_one()
+    return (json.loads(plan) if isinstance(plan, str) else plan)[0]['Plan']
+
+
+async def check(min_rows: int, max_removed: int, verbose: bool) -> list[Finding]:
+    findings = []
+
+    async with Database.engine.connect() as conn:
+        transaction = await conn.begin()
+        tables = await large_tables(conn, min_rows)
+        print(f'Tablas grandes (>= {min_rows} filas): {", ".join(sorted(tables)) or "ninguna"}')
+
+        captured: list[tuple[str, Any]] = []
+
+        def capture(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:  # noqa: ARG001
+            if not executemany and not statement.lstrip().upper().startswith(('SAVEPOINT', 'RELEASE', 'ROLLBACK')):
+                captured.append((statement, parameters))
+
+        # Los commits de los handlers se convierten en SAVEPOINTs de esta transacción
+        db = AsyncSession(bind=conn, join_transaction_mode='create_savepoint', expire_on_commit=False, autoflush=False)
+        ctx = await load_context(db)
+
+        for name, scenario in SCENARIOS.items():
+            captured.clear()
+            event.listen(conn.sync_engine, 'before_cursor_execute', capture)
+            try:
+                await scenario(db, ctx)
+            finally:
+                event.remove(conn.sync_engine, 'before_cursor_execute', capture)
+
+            statements = list(captured)
+            failed = 0
+            for statement, parameters in statements:
+                problems = plan_problems(await explain(conn, statement, parameters), tables, max_removed)
+                if problems:
+                    failed += 1
+                    findings.append(Finding(name, statement, problems))
+                elif verbose:
+                    print(f'    {" ".join(statement.split())[:120]}')
+
+            print(f'{"FAIL" if failed else "ok  "} {name:<28} {len(statements)} sentencias')
+
+        await db.close()
+        await transaction.rollback()
+
+    return findings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        '--url', default=None, help='postgresql:// URL (por defecto, a partir de DB_USER/DB_PASS/DB_NAME)',
+    )
+    parser.add_argument('--seed', action='store_true', help='sembrar datos de prueba antes de comprobar')
+    parser.add_argument('--rows', type=int, default=SEED_ROWS, help='tamaño de la siembra (filas de routine_exercise)')
+    parser.add_argument('--min-rows', type=int, default=MIN_ROWS, help='a partir de cuántas filas una tabla es grande')
+    parser.add_argument('--max-removed', type=int, default=MAX_REMOVED, help='filas descartadas por filtro permitidas')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    db_url = args.url or database_url('localhost')
+    Database.migrate(db_url)
+    Database.init(db_url)
+    if args.seed:
+        await seed(args.rows)
+    await analyze()
+
+    findings = await check(args.min_rows, args.max_removed, args.verbose)
+    await Database.engine.dispose()
+
+    for finding in findings:
+        print(f'\n{finding}')
+
+    sys.exit(1 if findings else 0)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,38 @@
+"""Reconstruye la tabla meal_nutrition a partir de food_meal y foods.
+
+Equivale a POST /admin/nutrition/rebuild, para usarlo sin pasar por la API:
+
+    python -m tools.rebuild_nutrition
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from app.database import Database, database_url
+from app.nutrition import refresh_meals
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        '--url', default=None, help='postgresql:// URL (por defecto, a partir de DB_USER/DB_PASS/DB_NAME)',
+    )
+    args = parser.parse_args()
+
+    db_url = args.url or database_url('localhost')
+    Database.migrate(db_url)
+    Database.init(db_url)
+
+    start = time.perf_counter()
+    async with Database.new_session() as db:
+        meals = await refresh_meals(db)
+        await db.commit()
+
+    print(f'{meals} comidas recalculadas en {(time.perf_counter() - start) * 1000:.1f} ms')
+    await Database.engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
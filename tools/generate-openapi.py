@@ -5,12 +5,12 @@ from pathlib import Path
 from subprocess import Popen
 from sys import executable
 
-from backend.app.__main__ import app
+from backend.app.__main__ import create_app
 
 
 if __name__ == '__main__':
     with open('openapi.yaml', 'w') as f:
-        dump(app.openapi(), f, indent=4)
+        dump(create_app().openapi(), f, indent=4)
 
     Popen(
         [